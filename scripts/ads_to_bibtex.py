@@ -11,39 +11,52 @@ import os
 import re
 import time
 import json
+import random
+import threading
+import argparse
 import requests
+import requests.adapters
 import bibtexparser
+from concurrent.futures import ThreadPoolExecutor
 from bibtexparser.bparser import BibTexParser
-from bibtexparser.bwriter import BibTexWriter
 from datetime import datetime
+import bibtex_merge
+from http_cache import ResponseCache, make_cache_key
+from bibtex_store import BibtexStore, fingerprint_doc, entry_bibcode
+from sync_journal import SyncJournal
+from file_utils import repo_path, cache_path
 
 # Configuration
 AUTHOR_QUERIES = ["author:\"Hayne, P\"", "author:\"Hayne, Paul\"", "author:\"Hayne, Paul O\""]  # Multiple author name variants
 ORCID = "0000-0003-4399-0449"  # Your ORCID if you have one (leave empty if not)
-BIBTEX_PATH = "../_bibliography/papers.bib"
+BIBTEX_PATH = repo_path("_bibliography", "papers.bib")
 ADS_API_TOKEN = os.environ.get("ADS_API_TOKEN", "")  # Read from env; generate a key at https://ui.adsabs.harvard.edu/user/settings/token
 ADS_API_URL = "https://api.adsabs.harvard.edu/v1/search/query"
-MAX_PUBLICATIONS = 300  # Maximum number of publications to fetch
+ADS_EXPORT_URL = "https://api.adsabs.harvard.edu/v1/export/bibtex"
+MAX_PUBLICATIONS = None  # Maximum number of publications to fetch (None for no limit)
+PAGE_SIZE = 100  # Number of search results requested per page
+EXPORT_BATCH_SIZE = 50  # Number of bibcodes per BibTeX export request
+EXPORT_WORKERS = 4  # Number of concurrent BibTeX export requests
+REQUEST_TIMEOUT = (5, 60)  # Connect and read timeouts for ADS requests, in seconds
+MAX_RETRIES = 5  # Retries for a request that fails with 429, 5xx or a connection error
+RETRY_STATUSES = {429, 500, 502, 503, 504}  # HTTP statuses that are retried
+BACKOFF_BASE = 1.0  # Initial backoff delay in seconds, doubled on every retry
+BACKOFF_MAX = 60.0  # Upper bound on a single backoff delay in seconds
+RATE_LIMIT = 2.0  # Sustained ADS requests per second
+RATE_BURST = 4  # Maximum burst of back-to-back ADS requests
+CACHE_PATH = cache_path("ads_cache.sqlite")  # On-disk cache of ADS responses
+CACHE_TTL = 12 * 3600  # Seconds before a cached response is revalidated with ADS
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # Least recently used responses are evicted beyond this size
+STORE_PATH = cache_path("bibtex_store.sqlite")  # Previously exported BibTeX entries by bibcode
+JOURNAL_PATH = cache_path("ads_sync.journal")  # Checkpoints of an in-progress sync
+JOURNAL_MAX_AGE = 24 * 3600  # Seconds after which an unfinished sync is restarted rather than resumed
+SEARCH_FIELDS = ["bibcode", "alternate_bibcode", "doctype", "title", "pub", "volume", "page", "doi", "year"]  # Only the fields the pipeline uses
 REFEREED_ONLY = True  # Set to True to only include peer-reviewed publications
 FILTER_TYPES = ["article", "inbook", "inproceedings"]  # Types of publications to include
 MIN_YEAR = 2003  # Minimum publication year to include (filter out publications before this year)
 
-def get_ads_publications():
-    """Fetch publications from ADS API"""
-    print(f"Fetching publications for author from ADS using multiple name variants...")
-    
-    if not ADS_API_TOKEN:
-        print("Error: ADS_API_TOKEN environment variable is not set.")
-        print("Generate a key at https://ui.adsabs.harvard.edu/user/settings/token and set it with:")
-        print("  export ADS_API_TOKEN=<your-token>")
-        return []
-    
-    headers = {
-        "Authorization": f"Bearer {ADS_API_TOKEN}",
-        "Content-type": "application/json"
-    }
-    
-    # Build the query
+def build_ads_query():
+    """Build the ADS search query string from the configuration"""
     query_parts = []
     
     # Use OR to combine multiple author name variants
@@ -60,88 +73,422 @@ def get_ads_publications():
     # Add year filter to exclude publications before MIN_YEAR
     query_parts.append(f"year:{MIN_YEAR}-")
     
-    query = " ".join(query_parts)
+    return " ".join(query_parts)
+
+class ADSError(Exception):
+    """Raised when an ADS request fails after all retries"""
+
+class IncompleteExportError(ADSError):
+    """Raised when some BibTeX export batches could not be fetched
     
-    params = {
-        "q": query,
-        "fl": "bibcode,title,author,pub,volume,issue,page,year,doctype,identifier,doi,abstract",
-        "rows": MAX_PUBLICATIONS,
-        "sort": "date desc"
-    }
+    Carries the bibcodes of the failed batches so the caller can report
+    them; entries from batches that did succeed are kept in the BibtexStore,
+    so rerunning only exports what is still missing.
+    """
     
-    try:
-        response = requests.get(ADS_API_URL, params=params, headers=headers)
-        response.raise_for_status()  # Raise an exception for non-200 status codes
-        
-        data = response.json()
-        if 'response' not in data:
-            print(f"Error: Unexpected response from ADS API: {data}")
-            return []
-        
-        print(f"Found {data['response']['numFound']} publications in total")
-        
-        # Filter by publication type if needed
-        publications = []
-        for doc in data['response']['docs']:
-            if not FILTER_TYPES or doc.get('doctype', '').lower() in FILTER_TYPES:
-                publications.append(doc)
-        
-        print(f"Including {len(publications)} publications after filtering")
-        return publications
+    def __init__(self, failed_batches):
+        self.failed_batches = failed_batches
+        count = sum(len(batch) for batch in failed_batches)
+        super().__init__(f"{len(failed_batches)} export batch(es) failed ({count} bibcodes)")
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter for ADS API calls
     
-    except Exception as e:
-        print(f"Error fetching publications from ADS: {e}")
-        return []
+    Tokens refill continuously at `rate` per second up to `capacity`. The
+    bucket can also be paused from ADS rate-limit response headers, in which
+    case every caller waits until the server says requests may resume.
+    """
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.resume_at = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if now < self.resume_at:
+                    wait = self.resume_at - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def pause(self, seconds):
+        """Stop handing out tokens for the given number of seconds"""
+        with self.lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+            self.tokens = 0
+    
+    def update_from_headers(self, headers):
+        """Honour Retry-After and X-RateLimit-* headers from an ADS response"""
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                self.pause(float(retry_after))
+            except ValueError:
+                pass
+            return
+        
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                if int(remaining) <= 0:
+                    # X-RateLimit-Reset is a UNIX timestamp
+                    self.pause(max(0.0, float(reset) - time.time()))
+            except ValueError:
+                pass
 
-def get_bibtex_for_publications(publications):
-    """Get BibTeX entries for a list of publications using the ADS API"""
-    print("Fetching BibTeX entries from ADS...")
+class ADSClient:
+    """Shared client for all ADS API calls
     
-    if not publications:
-        return []
+    Wraps a pooled keep-alive requests.Session, the rate limiter and the
+    optional response cache. Requests that fail with 429, a 5xx status or
+    a connection error are retried with exponential backoff and jitter.
+    """
     
-    headers = {
-        "Authorization": f"Bearer {ADS_API_TOKEN}",
-        "Content-type": "application/json"
-    }
+    def __init__(self, token=None, cache=None, offline=False, timeout=None,
+                 max_retries=None, pool_size=None):
+        self.cache = cache
+        self.offline = offline
+        self.timeout = REQUEST_TIMEOUT if timeout is None else timeout
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.limiter = TokenBucket(RATE_LIMIT, RATE_BURST)
+        
+        pool_size = pool_size or EXPORT_WORKERS + 1
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {ADS_API_TOKEN if token is None else token}",
+            "Content-type": "application/json"
+        })
     
-    bibcodes = [pub['bibcode'] for pub in publications]
-    bibtex_entries = []
+    def backoff(self, attempt):
+        """Exponential backoff delay with full jitter"""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
     
-    # Process in batches of 50 to avoid API limits
-    batch_size = 50
-    for i in range(0, len(bibcodes), batch_size):
-        batch = bibcodes[i:i+batch_size]
-        print(f"Processing batch {i//batch_size + 1}/{(len(bibcodes) + batch_size - 1)//batch_size}...")
+    def request(self, method, url, params=None, data=None):
+        """Perform an ADS API request and return the decoded JSON body
+        
+        When a cache is configured, fresh responses are served from it and
+        stale ones are revalidated with If-None-Match/If-Modified-Since. In
+        offline mode the network is never touched and a cache miss is an error.
+        """
+        cache = self.cache
+        key = make_cache_key(method, url, params, data)
+        cached = cache.get(key) if cache is not None else None
+        
+        if self.offline:
+            if cached is None:
+                raise ADSError(f"{url} is not in the cache (offline mode)")
+            return json.loads(cached["body"])
+        
+        if cached is not None and cache.is_fresh(cached):
+            return json.loads(cached["body"])
         
+        headers = {}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.request(
+                    method, url, headers=headers, params=params, data=data, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise ADSError(f"{method} {url} failed: {e}") from e
+                time.sleep(self.backoff(attempt))
+                continue
+            
+            self.limiter.update_from_headers(response.headers)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                # Retry-After has already paused the limiter; otherwise back off
+                if not response.headers.get("Retry-After"):
+                    time.sleep(self.backoff(attempt))
+                continue
+            break
+        
+        if response.status_code == 304 and cached is not None:
+            # Unchanged since we last fetched it
+            cache.touch(key)
+            return json.loads(cached["body"])
+        
+        try:
+            response.raise_for_status()  # Raise an exception for non-200 status codes
+        except requests.HTTPError as e:
+            raise ADSError(f"{method} {url} failed: {e}") from e
+        
+        if cache is not None:
+            cache.put(
+                key,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        return response.json()
+    
+    def search_page(self, query, cursor_mark):
+        """Fetch a single page of search results starting at the given cursor"""
+        params = {
+            "q": query,
+            "fl": ",".join(SEARCH_FIELDS),
+            "rows": PAGE_SIZE,
+            # cursorMark paging requires a sort on a unique field as tie-breaker
+            "sort": "date desc, bibcode desc",
+            "cursorMark": cursor_mark
+        }
+        
+        data = self.request("GET", ADS_API_URL, params=params)
+        if 'response' not in data:
+            raise ADSError(f"Unexpected response from ADS API: {data}")
+        return data
+    
+    def export_batch(self, batch):
+        """Export one batch of bibcodes as BibTeX entries"""
         data = {
             "bibcode": batch
         }
         
-        try:
-            response = requests.post(
-                "https://api.adsabs.harvard.edu/v1/export/bibtex",
-                headers=headers,
-                data=json.dumps(data)
-            )
-            response.raise_for_status()
+        result = self.request("POST", ADS_EXPORT_URL, data=json.dumps(data))
+        if 'export' not in result:
+            raise ADSError(f"Unexpected response from ADS API: {result}")
+        
+        # Parse the BibTeX entries
+        bibtex_str = result['export']
+        parser = BibTexParser()
+        bib_database = bibtexparser.loads(bibtex_str, parser)
+        
+        # Return the entries in the order the bibcodes were requested
+        order = {bibcode: i for i, bibcode in enumerate(batch)}
+        return sorted(bib_database.entries, key=lambda e: order.get(entry_bibcode(e), len(order)))
+    
+    def close(self):
+        self.session.close()
+
+def iter_ads_publications(client, journal=None):
+    """Yield publications from the ADS API page by page
+    
+    Uses cursorMark paging so there is no upper bound on the number of
+    records. The next page is requested in the background while the
+    current one is being consumed, so downstream processing can start
+    on the first page while later pages are still in flight. Pages already
+    recorded in the journal are replayed instead of being fetched again.
+    Raises ADSError if a page cannot be fetched.
+    """
+    print(f"Fetching publications for author from ADS using multiple name variants...")
+    
+    query = build_ads_query()
+    
+    def fetch_page(cursor):
+        if journal is not None:
+            data = journal.get_page(cursor)
+            if data is not None:
+                return data
+        data = client.search_page(query, cursor)
+        if journal is not None:
+            journal.record_page(cursor, data)
+        return data
+    
+    cursor_mark = "*"
+    fetched = 0
+    included = 0
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch_page, cursor_mark)
+        while future is not None:
+            data = future.result()
             
-            result = response.json()
-            if 'export' not in result:
-                print(f"Error: Unexpected response from ADS API: {result}")
-                continue
+            if cursor_mark == "*":
+                print(f"Found {data['response']['numFound']} publications in total")
             
-            # Parse the BibTeX entries
-            bibtex_str = result['export']
-            parser = BibTexParser()
-            bib_database = bibtexparser.loads(bibtex_str, parser)
-            bibtex_entries.extend(bib_database.entries)
+            docs = data['response']['docs']
+            next_cursor_mark = data.get('nextCursorMark')
             
-            # Wait a bit to avoid hitting rate limits
-            time.sleep(1)
+            # Queue up the next page before handing out this one
+            future = None
+            if docs and next_cursor_mark and next_cursor_mark != cursor_mark:
+                if MAX_PUBLICATIONS is None or fetched + len(docs) < MAX_PUBLICATIONS:
+                    cursor_mark = next_cursor_mark
+                    future = executor.submit(fetch_page, cursor_mark)
             
+            for doc in docs:
+                if MAX_PUBLICATIONS is not None and fetched >= MAX_PUBLICATIONS:
+                    break
+                fetched += 1
+                
+                # Filter by publication type if needed
+                if not FILTER_TYPES or doc.get('doctype', '').lower() in FILTER_TYPES:
+                    included += 1
+                    yield doc
+    
+    print(f"Including {included} publications after filtering")
+
+def get_ads_publications(client, journal=None):
+    """Fetch publications from ADS API"""
+    return list(iter_ads_publications(client, journal))
+
+def match_exported(batch, exported, aliases):
+    """Pair the entries exported for a batch with the bibcodes requested
+    
+    An entry is matched by its own bibcode, or by an alternate bibcode of a
+    requested record (aliases maps those to the requested bibcode). ADS
+    exports a batch in the order requested, so if as many entries as
+    bibcodes are left over, they are paired by position. Returns a dict of
+    entries by requested bibcode and a list of the entries left unmatched.
+    """
+    wanted = set(batch)
+    matched = {}
+    leftover = []
+    for entry in exported:
+        bibcode = entry_bibcode(entry)
+        if bibcode not in wanted:
+            bibcode = aliases.get(bibcode)
+        if bibcode in wanted and bibcode not in matched:
+            matched[bibcode] = entry
+        else:
+            leftover.append(entry)
+    
+    missing = [bibcode for bibcode in batch if bibcode not in matched]
+    if leftover and len(leftover) == len(missing):
+        matched.update(zip(missing, leftover))
+        leftover = []
+    return matched, leftover
+
+def get_bibtex_for_publications(publications, client, store=None, journal=None, workers=None):
+    """Get BibTeX entries for a list of publications using the ADS API
+    
+    When a BibtexStore is given, publications whose search fingerprint is
+    unchanged are served from it and only new or changed bibcodes are sent
+    to the export endpoint. Batches recorded in the journal by an earlier,
+    interrupted run are not exported again. Raises IncompleteExportError if
+    any batch fails.
+    """
+    print("Fetching BibTeX entries from ADS...")
+    
+    if workers is None:
+        workers = EXPORT_WORKERS
+    
+    bibcodes = []
+    fingerprints = {}
+    entries_by_bibcode = {}
+    futures = []
+    pending = []
+    aliases = {}
+    unmatched = []
+    failed_batches = []
+    
+    def collect(batch, future):
+        """Record the entries of a finished export batch in the store and journal"""
+        try:
+            exported = future.result()
         except Exception as e:
             print(f"Error fetching BibTeX entries from ADS: {e}")
+            failed_batches.append(batch)
+            return
+        
+        completed, leftover = match_exported(batch, exported, aliases)
+        for bibcode, entry in completed.items():
+            entries_by_bibcode[bibcode] = entry
+            if store is not None:
+                store.put(bibcode, fingerprints[bibcode], entry)
+        if leftover:
+            print(f"Warning: {len(leftover)} exported entries match no requested bibcode; they will not be stored")
+            unmatched.extend(leftover)
+        
+        if journal is not None:
+            journal.record_batch(completed)
+    
+    def drain(block):
+        """Collect finished batches, or all of them if block is True"""
+        for item in list(futures):
+            batch, future = item
+            if future.cancelled():
+                futures.remove(item)
+            elif block or future.done():
+                futures.remove(item)
+                collect(batch, future)
+    
+    def submit(batch):
+        nonlocal batch_count
+        batch_count += 1
+        print(f"Processing batch {batch_count} ({len(batch)} bibcodes)...")
+        futures.append((batch, executor.submit(client.export_batch, batch)))
+        # Record batches as they finish, so they survive a later failure
+        drain(block=False)
+    
+    batch_count = 0
+    reused = 0
+    
+    # Process in batches of 50 to avoid API limits
+    batch_size = EXPORT_BATCH_SIZE
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            # Publications may be a generator, so they are consumed lazily and
+            # each batch is exported as soon as enough search results have arrived
+            for pub in publications:
+                bibcode = pub['bibcode']
+                bibcodes.append(bibcode)
+                
+                if journal is not None:
+                    journalled = journal.get_entry(bibcode)
+                    if journalled is not None:
+                        entries_by_bibcode[bibcode] = journalled
+                        reused += 1
+                        continue
+                
+                if store is not None:
+                    fingerprints[bibcode] = fingerprint_doc(pub)
+                    stored = store.get(bibcode, fingerprints[bibcode])
+                    if stored is not None:
+                        entries_by_bibcode[bibcode] = stored
+                        reused += 1
+                        continue
+                
+                pending.append(bibcode)
+                for alternate in pub.get('alternate_bibcode') or ():
+                    aliases[alternate] = bibcode
+                if len(pending) == batch_size:
+                    submit(pending)
+                    pending = []
+            
+            if pending:
+                submit(pending)
+            
+            if store is not None or journal is not None:
+                print(f"Reused {reused} stored entries, exporting {len(bibcodes) - reused}")
+        except BaseException:
+            # On an error or Ctrl-C, drop batches not yet started but keep
+            # the work of those already running or finished
+            for _, future in futures:
+                future.cancel()
+            drain(block=True)
+            raise
+        drain(block=True)
+    
+    if failed_batches:
+        raise IncompleteExportError(failed_batches)
+    
+    # Reassemble results in bibcode order
+    bibtex_entries = [entries_by_bibcode[b] for b in bibcodes if b in entries_by_bibcode]
+    bibtex_entries.extend(unmatched)
     
     print(f"Successfully fetched {len(bibtex_entries)} BibTeX entries")
     return bibtex_entries
@@ -172,90 +519,50 @@ def process_bibtex_entries(entries):
 
 def update_bibtex_file(bibtex_entries):
     """Update the BibTeX file with new entries, preserving existing links"""
-    print("Updating BibTeX file...")
-    existing_entries = {}
-    
-    # Read existing BibTeX file if it exists
-    if os.path.exists(BIBTEX_PATH):
-        with open(BIBTEX_PATH, 'r') as f:
-            content = f.read()
-            # Extract YAML front matter
-            yaml_match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
-            yaml_header = yaml_match.group(0) if yaml_match else "---\n---\n\n"
-            
-            # Parse existing entries
-            parser = BibTexParser()
-            bib_database = bibtexparser.loads(content.replace(yaml_header, ""), parser)
-            
-            for entry in bib_database.entries:
-                existing_entries[entry.get('ID')] = entry
-    else:
-        yaml_header = "---\n---\n\n"
-    
-    print(f"Found {len(existing_entries)} existing entries.")
-    
-    # Merge new entries with existing ones
-    merged_entries = []
-    new_count = 0
-    updated_count = 0
-    preserved_count = 0
-    
-    for entry in bibtex_entries:
-        key = entry.get('ID')
-        if key in existing_entries:
-            # If this entry already exists, preserve any custom fields
-            existing = existing_entries[key]
-            
-            # Preserve title with links from existing entry if it has links
-            if '<a href=' in existing.get('title', ''):
-                entry['title'] = existing['title']
-            
-            # Copy any additional fields from existing entry
-            for field_key, value in existing.items():
-                if field_key not in entry and field_key not in ['ID', 'ENTRYTYPE']:
-                    entry[field_key] = value
-            
-            updated_count += 1
-            del existing_entries[key]
-        else:
-            new_count += 1
-        
-        merged_entries.append(entry)
-    
-    # Add any remaining existing entries that weren't in the new entries
-    for key, entry in existing_entries.items():
-        merged_entries.append(entry)
-        preserved_count += 1
-    
-    # Sort entries by year (descending)
-    merged_entries.sort(key=lambda x: int(x.get('year', '0')), reverse=True)
-    
-    # Write the updated BibTeX file
-    writer = BibTexWriter()
-    writer.indent = '  '
-    bib_database = bibtexparser.bibdatabase.BibDatabase()
-    bib_database.entries = merged_entries
-    
-    with open(BIBTEX_PATH, 'w') as f:
-        f.write(yaml_header)
-        f.write(writer.write(bib_database))
-    
-    print(f"Successfully updated {BIBTEX_PATH} with {len(merged_entries)} publications:")
-    print(f"  - {new_count} new entries added")
-    print(f"  - {updated_count} existing entries updated")
-    print(f"  - {preserved_count} existing entries preserved")
+    return bibtex_merge.update_bibtex_file(BIBTEX_PATH, bibtex_entries)
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Update the BibTeX file from NASA ADS")
+    parser.add_argument("--offline", action="store_true",
+                        help="serve all ADS responses from the local cache without network access")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not read or write the local ADS response cache and BibTeX store")
+    parser.add_argument("--restart", action="store_true",
+                        help="discard the checkpoint journal of an interrupted sync and start over")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    cache = None
+    store = None
+    if not args.no_cache:
+        cache = ResponseCache(CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
+        store = BibtexStore(STORE_PATH)
+    elif args.offline:
+        print("Error: --offline requires the response cache.")
+        return
+    
+    if not ADS_API_TOKEN and not args.offline:
+        print("Error: ADS_API_TOKEN environment variable is not set.")
+        print("Generate a key at https://ui.adsabs.harvard.edu/user/settings/token and set it with:")
+        print("  export ADS_API_TOKEN=<your-token>")
+        return
+    
+    client = ADSClient(cache=cache, offline=args.offline)
+    journal = SyncJournal(JOURNAL_PATH, build_ads_query(), max_age=JOURNAL_MAX_AGE)
+    if args.restart:
+        journal.reset()
+    elif journal.resumed:
+        print(f"Resuming interrupted sync ({len(journal.pages)} search pages, "
+              f"{len(journal.entries)} entries already fetched)")
+    
     try:
-        # Fetch publications from ADS
-        publications = get_ads_publications()
-        
-        if not publications:
-            print("No publications were fetched. Exiting.")
-            return
+        # Stream publications from ADS straight into the BibTeX export
+        publications = iter_ads_publications(client, journal=journal)
         
         # Get BibTeX entries from ADS
-        bibtex_entries = get_bibtex_for_publications(publications)
+        bibtex_entries = get_bibtex_for_publications(publications, client, store=store, journal=journal)
         
         if not bibtex_entries:
             print("No BibTeX entries were generated. Exiting.")
@@ -264,17 +571,32 @@ def main():
         # Process BibTeX entries
         processed_entries = process_bibtex_entries(bibtex_entries)
         
-        # Update BibTeX file
+        # Update BibTeX file only once every page and batch is in
         update_bibtex_file(processed_entries)
+        journal.complete()
         
         print("Publication update completed successfully.")
         
     except KeyboardInterrupt:
-        print("\nProcess interrupted by user. Exiting.")
+        print("\nProcess interrupted by user. Progress has been saved; rerun to resume.")
+    except IncompleteExportError as e:
+        print(f"Error: {e}")
+        for batch in e.failed_batches:
+            print(f"  - failed batch starting at {batch[0]}")
+        print(f"{BIBTEX_PATH} was left unchanged. Rerun to resume; completed batches will not be exported again.")
+    except ADSError as e:
+        print(f"Error: {e}")
+        print(f"{BIBTEX_PATH} was left unchanged. Rerun to resume from the last completed page.")
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        client.close()
+        if cache is not None:
+            cache.close()
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
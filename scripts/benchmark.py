@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+'''
+Offline benchmarks of the bibliography and group-page pipeline.
+
+A synthetic corpus is generated from a fixed seed: BibTeX entries in the
+style of ADS exports (LaTeX titles, 3 to 200 authors, journal macros) and a
+group roster of the requested size. Each benchmark times one function, or
+the whole pipeline end to end, and reports its throughput and peak Python
+memory (traced in a separate run, so tracing does not skew the times).
+
+Results can be saved as a JSON baseline. Later runs are compared with it
+and fail (exit status 1) when the throughput of any benchmark drops, or its
+peak memory grows, by more than the threshold. Nothing touches the network
+or the site's own files.
+'''
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from collections import namedtuple
+import bibtex_merge
+import bibtex_to_yaml
+import update_group_page
+from image_index import ImageIndex
+from cv_reader import iter_cv_items
+from cv_to_bibtex import CV_PATH, parse_publication
+from benchmark_cv import enlarge_cv
+from file_utils import atomic_write, cache_path
+
+BASELINE_PATH = cache_path("benchmark_baseline.json")  # Results saved with --save
+ENTRIES = 1000  # Synthetic BibTeX entries
+MEMBERS = 20  # Synthetic group members
+REPEAT = 5  # Timed runs per benchmark; the best is kept
+THRESHOLD = 0.25  # Allowed relative loss of throughput or growth of peak memory
+SEED = 1
+
+# Material for the synthetic corpus
+LAST_NAMES = ["Hayne", "Sch{\\\"o}rghofer", "Aharonson", "Paige", "Greenhagen", "Siegler", "Bandfield",
+              "Williams", "Vasavada", "Lucey", "Ghent", "Powell", "Koeppel", "Bennett", "Garc{\\'\\i}a",
+              "M{\\\"u}ller", "Nu{\\~n}ez", "Hayes", "Kloos", "Rubanenko", "Prem", "Byrne", "Cohen"]
+FIRST_INITIALS = ["P.~O.", "N.", "O.", "D.~A.", "B.~T.", "M.~A.", "J.~L.", "J.-P.", "A.~R.", "K.~A."]
+FIRST_NAMES = ["Paul", "Norbert", "Ari", "Tyler", "Oded", "Margaret", "Jean-Pierre", "Ashwin", "Kris"]
+TITLE_WORDS = ["thermal", "inertia", "regolith", "lunar", "polar", "craters", "surface", "temperatures",
+               "Diviner", "observations", "ice", "stability", "Europa", "Mars", "boulders", "model"]
+TITLE_MARKUP = ["H$_{2}$O", "CO$_2$", "$\\sim$100 m", "{\\textit{in situ}}", "{\\it Lunar Reconnaissance Orbiter}",
+                "T$_{\\rm eff}$", "$>$95\\%", "{\\&}", "Schr{\\\"o}dinger", "{LRO}", "$\\mu$m"]
+JOURNALS = ["\\jgre", "\\icarus", "\\grl", "\\psj", "Nature Astronomy", "\\ssr", "\\planss"]
+ROLES = ["PhD Student", "Graduate Student", "Undergraduate Student", "Postdoc", "Research Associate", "Visitor"]
+
+Benchmark = namedtuple('Benchmark', ['name', 'unit', 'setup', 'run'])
+
+def make_group_members(count, rng):
+    """Synthetic group roster in the format of _data/group_members.yml"""
+    members = [{'name': "Paul Hayne", 'role': "Principal Investigator", 'status': "Current",
+                'image': "paul.jpg", 'website': "https://example.org", 'research_interest': "Planetary surfaces"}]
+    for i in range(count - 1):
+        last_name = rng.choice(LAST_NAMES).replace('{', '').replace('}', '').replace('\\', '')
+        member = {
+            'name': f"{rng.choice(FIRST_NAMES)} {last_name}{i}",
+            'role': rng.choice(ROLES),
+            'status': rng.choice(["Current", "Current", "Alumni (2020)"]),
+        }
+        if rng.random() < 0.7:
+            member['image'] = f"member{i}.jpg"
+        if rng.random() < 0.5:
+            member['research_interest'] = " ".join(rng.sample(TITLE_WORDS, 4))
+        members.append(member)
+    return members
+
+def make_author_list(rng, members):
+    """An ADS-style author field of 3 to 200 authors, some of them group members"""
+    count = min(200, 3 + int(rng.paretovariate(1.2)) - 1)
+    authors = []
+    for _ in range(count):
+        if members and rng.random() < 0.1:
+            member = rng.choice(members)['name'].split()
+            authors.append(f"{{{member[-1]}}}, {member[0][0]}.")
+        else:
+            authors.append(f"{{{rng.choice(LAST_NAMES)}}}, {rng.choice(FIRST_INITIALS)}")
+    if rng.random() < 0.5:
+        authors.insert(rng.randrange(len(authors)), "{Hayne}, P.~O.")
+    return " and ".join(authors)
+
+def make_title(rng):
+    words = rng.sample(TITLE_WORDS, rng.randint(5, 10))
+    for _ in range(rng.randint(0, 3)):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(TITLE_MARKUP))
+    return "{" + " ".join(words).capitalize() + "}"
+
+def make_bibtex_entries(count, rng, members, start=0):
+    """Synthetic parsed BibTeX entries in the style of ADS exports
+
+    Entries are numbered from start, which keeps the bibcodes, keys and
+    DOIs of separately generated sets apart.
+    """
+    entries = []
+    for i in range(start, start + count):
+        year = rng.randint(2003, 2026)
+        bibcode = f"{year}Synth.{i:05d}H"
+        entry = {
+            'ID': f"{year}Synth.{i:05d}",
+            'ENTRYTYPE': 'article',
+            'author': make_author_list(rng, members),
+            'title': make_title(rng),
+            'journal': rng.choice(JOURNALS),
+            'year': str(year),
+            'month': rng.choice(["jan", "mar", "jun", "sep", "dec"]),
+            'volume': str(rng.randint(1, 400)),
+            'pages': f"{rng.randint(1, 9000)}",
+            'adsurl': f"https://ui.adsabs.harvard.edu/abs/{bibcode}",
+        }
+        if rng.random() < 0.8:
+            entry['doi'] = f"10.{rng.randint(1000, 9999)}/synth.{i}"
+        entries.append(entry)
+    return entries
+
+def render_bibtex(entries):
+    """BibTeX file text for a list of entries, with YAML front matter"""
+    return bibtex_merge.BibtexDocument().render(entries)
+
+class Corpus:
+    """The synthetic data shared by all benchmarks"""
+
+    def __init__(self, entries=ENTRIES, members=MEMBERS, seed=SEED):
+        rng = random.Random(seed)
+        self.members = make_group_members(members, rng)
+        self.entries = make_bibtex_entries(entries, rng, self.members)
+        names = []
+        for member in self.members:
+            names.append(member['name'])
+            names.append(member['name'].split()[-1])
+        self.member_index = bibtex_to_yaml.GroupMemberIndex(names)
+        self.bibtex = render_bibtex(self.entries)
+
+        # An update from ADS: every entry again, a tenth of them changed,
+        # plus a tenth new ones
+        updated = [dict(entry) for entry in self.entries]
+        for entry in rng.sample(updated, len(updated) // 10):
+            entry['volume'] = str(int(entry['volume']) + 1)
+        self.incoming = updated + make_bibtex_entries(len(updated) // 10, rng, self.members, start=len(updated))
+
+    def params(self):
+        return {'entries': len(self.entries), 'members': len(self.members)}
+
+def write_file(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def benchmarks(corpus, directory):
+    """The benchmarks, each a setup run untimed before every timed run"""
+    bibtex_path = os.path.join(directory, "papers.bib")
+    yaml_path = os.path.join(directory, "papers.yml")
+    images = ImageIndex(directory)
+    titles = [entry['title'] for entry in corpus.entries]
+    authors = [bibtex_to_yaml.clean_bibtex_authors(bibtex_to_yaml.latex_to_text(entry['author']))
+               for entry in corpus.entries]
+
+    def reset_bibtex():
+        write_file(bibtex_path, corpus.bibtex)
+
+    def latex_to_text():
+        bibtex_to_yaml._latex_to_text_cached.cache_clear()
+        for title in titles:
+            bibtex_to_yaml.latex_to_text(title)
+        return len(titles)
+
+    def process_author_list():
+        # A fresh index, so no author is matched from an earlier run's cache
+        member_index = bibtex_to_yaml.GroupMemberIndex(corpus.member_index.parts)
+        for author_list in authors:
+            bibtex_to_yaml.process_author_list(author_list, member_index)
+        return len(authors)
+
+    def convert_bibtex_to_yaml():
+        # Cold caches: no memoised LaTeX and a fresh member index
+        bibtex_to_yaml._latex_to_text_cached.cache_clear()
+        member_index = bibtex_to_yaml.GroupMemberIndex(corpus.member_index.parts)
+        bibtex_to_yaml.convert_bibtex_to_yaml(bibtex_path, yaml_path, cache_path=None,
+                                              member_index=member_index)
+        return len(corpus.entries)
+
+    def update_bibtex_file():
+        bibtex_merge.update_bibtex_file(bibtex_path, [dict(entry) for entry in corpus.incoming])
+        return len(corpus.incoming)
+
+    def generate_markdown_content():
+        categories = update_group_page.categorize_members(corpus.members)
+        update_group_page.generate_markdown_content(categories, images, {})
+        return len(corpus.members)
+
+    def end_to_end():
+        count = update_bibtex_file()
+        convert_bibtex_to_yaml()
+        generate_markdown_content()
+        return count
+
+    cases = [
+        Benchmark('latex_to_text', 'titles', None, latex_to_text),
+        Benchmark('process_author_list', 'author lists', None, process_author_list),
+        Benchmark('convert_bibtex_to_yaml', 'entries', reset_bibtex, convert_bibtex_to_yaml),
+        Benchmark('update_bibtex_file', 'entries', reset_bibtex, update_bibtex_file),
+        Benchmark('generate_markdown_content', 'members', None, generate_markdown_content),
+        Benchmark('end_to_end', 'entries', reset_bibtex, end_to_end),
+    ]
+
+    # The CV extraction benchmark of benchmark_cv.py, on the CV enlarged 8 times
+    if os.path.exists(CV_PATH):
+        with open(CV_PATH, 'r', encoding='utf-8') as f:
+            cv_text = enlarge_cv(f.read(), 8)
+
+        def cv_extraction():
+            items = list(iter_cv_items(cv_text))
+            for year, pub_text in items:
+                parse_publication(year, pub_text)
+            return len(items)
+
+        cases.append(Benchmark('cv_extraction', 'items', None, cv_extraction))
+    return cases
+
+def measure(benchmark, repeat):
+    """Return (best seconds, items per run, peak traced memory in bytes)
+
+    An untimed first run warms up caches such as compiled regexes.
+    """
+    best = None
+    for i in range(repeat + 1):
+        if benchmark.setup:
+            benchmark.setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            count = benchmark.run()
+            elapsed = time.perf_counter() - started
+        if i > 0:
+            best = elapsed if best is None else min(best, elapsed)
+
+    if benchmark.setup:
+        benchmark.setup()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            benchmark.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, count, peak
+
+def run_benchmarks(corpus, repeat=REPEAT, only=None):
+    """Run the benchmarks; return {name: result dict}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for benchmark in benchmarks(corpus, directory):
+            if only and benchmark.name not in only:
+                continue
+            seconds, count, peak = measure(benchmark, repeat)
+            results[benchmark.name] = {
+                'seconds': seconds,
+                'count': count,
+                'unit': benchmark.unit,
+                'throughput': count / seconds if seconds else float('inf'),
+                'peak_mb': peak / (1024 * 1024),
+            }
+            print(f"  {benchmark.name:<26} {count:>7} {benchmark.unit:<13} {seconds * 1000:>10.1f} ms "
+                  f"{results[benchmark.name]['throughput']:>12,.0f}/s {results[benchmark.name]['peak_mb']:>9.2f} MB")
+    return results
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable baseline {path}: {e}")
+        return None
+
+def compare(results, baseline, threshold):
+    """Print a comparison with the baseline; return the names of regressed benchmarks"""
+    regressions = []
+    print(f"\nCompared with the baseline (threshold {threshold:.0%}):")
+    for name, result in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"  {name:<26} not in baseline")
+            continue
+        speed = result['throughput'] / previous['throughput'] - 1
+        memory = result['peak_mb'] / previous['peak_mb'] - 1 if previous['peak_mb'] else 0.0
+        regressed = speed < -threshold or memory > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<26} throughput {speed:+7.1%}  peak memory {memory:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the bibliography and group-page pipeline offline")
+    parser.add_argument("--entries", "-n", type=int, default=ENTRIES, help="synthetic BibTeX entries (default %(default)s)")
+    parser.add_argument("--members", "-m", type=int, default=MEMBERS, help="synthetic group members (default %(default)s)")
+    parser.add_argument("--repeat", "-r", type=int, default=REPEAT, help="timed runs per benchmark (default %(default)s)")
+    parser.add_argument("--seed", type=int, default=SEED, help="random seed of the corpus (default %(default)s)")
+    parser.add_argument("--only", help="comma-separated names of the benchmarks to run")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file (default %(default)s)")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="fail if throughput drops or peak memory grows by more than this fraction "
+                             "(default %(default)s)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1")
+        sys.exit(1)
+    print(f"Generating {args.entries} entries and {args.members} group members (seed {args.seed})...")
+    corpus = Corpus(args.entries, args.members, args.seed)
+    only = set(args.only.split(",")) if args.only else None
+
+    print(f"  {'benchmark':<26} {'items':>7} {'':<13} {'best':>13} {'throughput':>14} {'peak':>12}")
+    results = run_benchmarks(corpus, args.repeat, only)
+
+    if args.save:
+        data = {'params': corpus.params(), 'python': sys.version.split()[0], 'results': results}
+        atomic_write(args.baseline, json.dumps(data, indent=2, sort_keys=True) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one.")
+        return
+    if baseline.get('params') != corpus.params():
+        print(f"\nWarning: Baseline was made with {baseline.get('params')}, not {corpus.params()}; "
+              "not comparing.")
+        return
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nError: {len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+'''
+Benchmark of the CV publication extraction on synthetically enlarged CVs.
+
+The body of the refereed-articles section is repeated 1, 2, 4, ... times
+and the CV is read and every item parsed, as cv_to_bibtex does. Time per
+kilobyte should stay flat as the CV grows, since the reader makes a single
+pass over the file.
+'''
+
+import re
+import sys
+import time
+import argparse
+from cv_reader import iter_cv_items, REFEREED_SECTION
+from cv_to_bibtex import CV_PATH, parse_publication
+
+HEADING = re.compile(r'\\large\s*\\textcolor\{darkgray\}\{([^{}]*)\}')
+SCALES = [1, 2, 4, 8, 16]
+
+def section_span(text, section=REFEREED_SECTION):
+    """Return the (start, end) of the body of a CV section"""
+    headings = list(HEADING.finditer(text))
+    for i, heading in enumerate(headings):
+        if section in heading.group(1):
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            return heading.end(), end
+    raise ValueError(f"Section {section!r} not found")
+
+def enlarge_cv(text, scale):
+    """Return the CV with the refereed-articles section repeated scale times"""
+    start, end = section_span(text)
+    return text[:end] + text[start:end] * (scale - 1) + text[end:]
+
+def time_extraction(text, repeat):
+    """Best wall-clock time of reading and parsing all items; item count"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = list(iter_cv_items(text))
+        for year, pub_text in items:
+            parse_publication(year, pub_text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(items)
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Time CV publication extraction on enlarged CVs")
+    parser.add_argument("--cv", default=CV_PATH, help="LaTeX CV (default %(default)s)")
+    parser.add_argument("--scales", default=",".join(str(scale) for scale in SCALES),
+                        help="comma-separated section repeat counts (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size; the best is reported")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1")
+        sys.exit(1)
+    with open(args.cv, 'r', encoding='utf-8') as f:
+        cv_content = f.read()
+
+    print(f"{'scale':>5} {'size (KB)':>10} {'items':>7} {'time (ms)':>10} {'us/KB':>8}")
+    for scale in (int(scale) for scale in args.scales.split(",")):
+        text = enlarge_cv(cv_content, scale)
+        elapsed, count = time_extraction(text, args.repeat)
+        size_kb = len(text.encode('utf-8')) / 1024
+        print(f"{scale:>5} {size_kb:>10.1f} {count:>7} {elapsed * 1000:>10.2f} {elapsed * 1e6 / size_kb:>8.1f}")
+
+if __name__ == "__main__":
+    main()
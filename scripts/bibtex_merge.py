@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+'''
+Shared merge engine for updating the site's BibTeX file.
+
+Used by both ads_to_bibtex.py and cv_to_bibtex.py. Existing entries are
+indexed by citation key, DOI and bibcode so every incoming entry is matched
+in constant time, including duplicates filed under a different key (same
+DOI or bibcode, different ID). How the fields of a matched pair are combined
+is decided by a pluggable merge policy.
+'''
+
+import os
+import re
+from bibtexparser.bwriter import BibTexWriter
+from bibtexparser.bibdatabase import BibDatabase
+from bibtex_reader import open_bibtex, front_matter_end, iter_bibtex_entries
+from file_utils import write_if_changed
+
+DEFAULT_YAML_HEADER = "---\n---\n\n"
+# The start of an entry ("@article{key,"), which must not occur inside another
+EMBEDDED_ENTRY = re.compile(rb'@\s*(?!(?:comment|string|preamble)\b)\w+\s*[{(]\s*[^\s,{}()=]+\s*,', re.IGNORECASE)
+
+def normalize_doi(doi):
+    """Normalise a DOI for matching (case-insensitive, no resolver prefix)"""
+    if not doi:
+        return None
+    doi = doi.strip().strip('{}').lower()
+    doi = re.sub(r'^(https?://(dx\.)?doi\.org/|doi:)', '', doi)
+    return doi or None
+
+def entry_bibcode(entry):
+    """Return the ADS bibcode of an entry, or None if it has none"""
+    adsurl = entry.get('adsurl', '')
+    if '/abs/' in adsurl:
+        return adsurl.rstrip('/').split('/abs/')[-1].split('/')[0]
+    return entry.get('bibcode')
+
+class BibtexIndex:
+    """Index of BibTeX entries by citation key, DOI and bibcode"""
+
+    def __init__(self, entries=()):
+        self.by_key = {}
+        self.by_doi = {}
+        self.by_bibcode = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        key = entry.get('ID')
+        if key:
+            self.by_key[key] = entry
+        doi = normalize_doi(entry.get('doi'))
+        if doi:
+            self.by_doi.setdefault(doi, entry)
+        bibcode = entry_bibcode(entry)
+        if bibcode:
+            self.by_bibcode.setdefault(bibcode, entry)
+
+    def remove(self, entry):
+        key = entry.get('ID')
+        if self.by_key.get(key) is entry:
+            del self.by_key[key]
+        doi = normalize_doi(entry.get('doi'))
+        if doi and self.by_doi.get(doi) is entry:
+            del self.by_doi[doi]
+        bibcode = entry_bibcode(entry)
+        if bibcode and self.by_bibcode.get(bibcode) is entry:
+            del self.by_bibcode[bibcode]
+
+    def find(self, entry):
+        """Return the indexed entry matching this one by key, DOI or bibcode"""
+        match = self.by_key.get(entry.get('ID'))
+        if match is not None:
+            return match
+        doi = normalize_doi(entry.get('doi'))
+        if doi and doi in self.by_doi:
+            return self.by_doi[doi]
+        bibcode = entry_bibcode(entry)
+        if bibcode and bibcode in self.by_bibcode:
+            return self.by_bibcode[bibcode]
+        return None
+
+def normalize_title(title):
+    """Normalise a title for matching (no markup, case or punctuation)"""
+    if not title:
+        return None
+    title = re.sub(r'<[^>]+>', ' ', title)
+    title = re.sub(r'[^0-9a-z]+', ' ', title.lower()).strip()
+    return title or None
+
+def key_suffix(n):
+    """Suffix for the n-th duplicate of a citation key: a..z, aa..az, ba..."""
+    letters = ''
+    while n > 0:
+        n, remainder = divmod(n - 1, 26)
+        letters = chr(ord('a') + remainder) + letters
+    return letters
+
+class KeyAllocator:
+    """Assigns unique citation keys of the form <base>, <base>a, <base>b, ...
+
+    Seeded with the entries already in the BibTeX file, so a paper whose
+    title is already on file keeps its existing key, and a new paper never
+    takes the key of a different existing one. Keys that can be merged by
+    ID are therefore stable across reruns, whatever the order of the input.
+    Each call is amortised O(1): used keys are kept in a set and the next
+    suffix to try is remembered per base key.
+    """
+
+    def __init__(self, existing_entries=()):
+        self.used = set()
+        self.reserved = set()
+        self.counters = {}
+        self.keys_by_title = {}
+        for entry in existing_entries:
+            key = entry.get('ID')
+            if not key:
+                continue
+            self.reserved.add(key)
+            title = normalize_title(entry.get('title'))
+            if title:
+                self.keys_by_title.setdefault(title, key)
+
+    def allocate(self, base_key, title=None):
+        """Return a unique key for an entry with this base key and title"""
+        title = normalize_title(title)
+        key = self.keys_by_title.get(title) if title else None
+        if (key is not None and key not in self.used and key.startswith(base_key)
+                and re.fullmatch(r'[a-z]*', key[len(base_key):])):
+            self.used.add(key)
+            return key
+
+        n = self.counters.get(base_key, 0)
+        key = base_key + key_suffix(n)
+        while key in self.used or key in self.reserved:
+            n += 1
+            key = base_key + key_suffix(n)
+        self.counters[base_key] = n + 1
+        self.used.add(key)
+        return key
+
+    def claim(self, key):
+        """Take a specific key, e.g. one recorded for an entry earlier
+
+        Returns False if the key has already been handed out in this run.
+        """
+        if key in self.used:
+            return False
+        self.used.add(key)
+        return True
+
+def precedence_policy(prefer_existing=()):
+    """Build a merge policy from a field precedence
+
+    Incoming fields win, except those listed in prefer_existing, which keep
+    the value already in the file. Fields only the existing entry has are
+    always carried over, and the existing citation key is kept so that
+    references to it stay valid.
+    """
+    prefer_existing = set(prefer_existing)
+
+    def policy(incoming, existing):
+        if existing is None:
+            return incoming
+        merged = dict(incoming)
+        for field, value in existing.items():
+            if field == 'ENTRYTYPE':
+                continue
+            if field == 'ID' or field not in merged or field in prefer_existing:
+                merged[field] = value
+        return merged
+
+    return policy
+
+def preserve_links_policy(incoming, existing):
+    """Default policy: incoming fields win, but a linked title is preserved"""
+    merged = precedence_policy()(incoming, existing)
+    if existing is not None and '<a href=' in existing.get('title', ''):
+        merged['title'] = existing['title']
+    return merged
+
+def merge_entries(existing_entries, incoming_entries, policy=preserve_links_policy):
+    """Merge incoming entries into existing ones in a single pass
+
+    Returns the merged list (incoming order first, then untouched existing
+    entries) and a dict of counts.
+    """
+    index = BibtexIndex(existing_entries)
+    matched = set()
+    merged_index = BibtexIndex()
+    merged_entries = []
+    stats = {'new': 0, 'updated': 0, 'preserved': 0, 'duplicates': 0}
+
+    for entry in incoming_entries:
+        # Collapse duplicates within the incoming set as well
+        earlier = merged_index.find(entry)
+        if earlier is not None:
+            combined = policy(entry, earlier)
+            merged_index.remove(earlier)
+            earlier.clear()
+            earlier.update(combined)
+            merged_index.add(earlier)
+            stats['duplicates'] += 1
+            continue
+
+        existing = index.find(entry)
+        if existing is not None and id(existing) not in matched:
+            if existing.get('ID') != entry.get('ID'):
+                stats['duplicates'] += 1
+            matched.add(id(existing))
+            stats['updated'] += 1
+        else:
+            existing = None
+            stats['new'] += 1
+
+        merged = policy(entry, existing)
+        merged_index.add(merged)
+        merged_entries.append(merged)
+
+    # Add any remaining existing entries that weren't in the new entries
+    for entry in existing_entries:
+        if id(entry) not in matched:
+            merged_entries.append(entry)
+            stats['preserved'] += 1
+
+    return merged_entries, stats
+
+class BibtexDocument:
+    """A parsed BibTeX file that remembers the original text of each entry"""
+
+    def __init__(self, data=b""):
+        # Extract YAML front matter
+        body_start = front_matter_end(data)
+        self.yaml_header = data[:body_start].decode('utf-8') if body_start else DEFAULT_YAML_HEADER
+
+        # Parse existing entries one at a time, remembering the original
+        # text of each together with the text preceding it (blank lines,
+        # @comment and @string blocks). Entries that cannot be parsed keep
+        # a block of their own, so their text is never mistaken for a gap.
+        self.entries = []
+        self.entries_by_key = {}
+        self.blocks = []
+        unparsed = []
+        gap_start = body_start
+
+        def add_block(key, start, end, parsed):
+            nonlocal gap_start
+            embedded = EMBEDDED_ENTRY.search(data, start + 1, end)
+            if embedded:
+                raise ValueError(f"Entry {key} appears to contain another entry "
+                                 f"({embedded.group(0).decode('utf-8', 'replace')}); check its braces")
+            self.blocks.append((
+                key,
+                data[gap_start:start].decode('utf-8'),
+                data[start:end].decode('utf-8'),
+                parsed
+            ))
+            gap_start = end
+
+        for entry, start, end in iter_bibtex_entries(data, body_start, unparsed=unparsed):
+            for block in unparsed:
+                add_block(*block, False)
+            unparsed.clear()
+            self.entries.append(entry)
+            self.entries_by_key.setdefault(entry['ID'], entry)
+            add_block(entry['ID'], start, end, True)
+        for block in unparsed:
+            add_block(*block, False)
+        self.trailer = data[gap_start:].decode('utf-8') if self.blocks else "\n"
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open_bibtex(path) as data:
+            return cls(data)
+
+    def render(self, entries):
+        """Render entries, reusing the original text of unchanged ones
+
+        Existing entries keep their position and, when their fields are
+        unchanged, their exact original bytes. Only new or modified entries
+        are serialised again. New entries are slotted in by citation key,
+        matching the order BibTexWriter uses for a full rewrite. An entry
+        that could not be parsed is replaced in place by an entry with the
+        same key, or else kept as it is. No key is written twice.
+        """
+        writer = BibTexWriter()
+        writer.indent = '  '
+        entries_by_key = {entry['ID']: entry for entry in entries}
+
+        def serialise(entry):
+            db = BibDatabase()
+            db.entries = [entry]
+            return writer.write(db).strip('\n')
+
+        slotted = {key for key, _, _, _ in self.blocks}
+        new_entries = sorted(
+            (entry for key, entry in entries_by_key.items() if key not in slotted),
+            key=lambda entry: entry['ID']
+        )
+
+        parts = [self.yaml_header]
+        separator = "\n\n"
+        emitted = False
+        written = set()
+        new_index = 0
+        for key, gap, raw, parsed in self.blocks:
+            entry = entries_by_key.get(key)
+            if key in written or (entry is None and parsed):
+                continue
+
+            # Whatever lands in this slot first inherits the original gap
+            leading = gap
+            while new_index < len(new_entries) and new_entries[new_index]['ID'] < key:
+                parts.append(leading)
+                parts.append(serialise(new_entries[new_index]))
+                leading = separator
+                new_index += 1
+
+            parts.append(leading)
+            if entry is None or (parsed and entry == self.entries_by_key.get(key)):
+                parts.append(raw)
+            else:
+                parts.append(serialise(entry))
+            written.add(key)
+            emitted = True
+
+        for entry in new_entries[new_index:]:
+            parts.append(separator if emitted else "")
+            parts.append(serialise(entry))
+            emitted = True
+
+        parts.append(self.trailer)
+        return "".join(parts)
+
+def read_bibtex_file(path):
+    """Read a BibTeX file, returning its YAML front matter and entries"""
+    document = BibtexDocument.load(path)
+    return document.yaml_header, document.entries
+
+def update_bibtex_file(path, bibtex_entries, policy=preserve_links_policy, remove_keys=()):
+    """Update the BibTeX file with new entries, preserving existing links
+
+    Existing entries whose citation key is in remove_keys are dropped,
+    unless one of the incoming entries has the same key. Unchanged entries
+    keep their original text, the file is replaced atomically, and nothing
+    is written when the result is identical to what is already on disk.
+    """
+    print("Updating BibTeX file...")
+    document = BibtexDocument.load(path)
+    existing_entries = document.entries
+    print(f"Found {len(existing_entries)} existing entries.")
+
+    remove_keys = set(remove_keys) - {entry.get('ID') for entry in bibtex_entries}
+    kept_entries = [entry for entry in existing_entries if entry.get('ID') not in remove_keys]
+    removed = len(existing_entries) - len(kept_entries)
+
+    merged_entries, stats = merge_entries(kept_entries, bibtex_entries, policy)
+    stats['removed'] = removed
+
+    content = document.render(merged_entries)
+    if not write_if_changed(path, content, ignore=None):
+        print(f"{path} unchanged ({len(merged_entries)} publications); not rewriting it.")
+        return stats
+
+    print(f"Successfully updated {path} with {len(merged_entries)} publications:")
+    print(f"  - {stats['new']} new entries added")
+    print(f"  - {stats['updated']} existing entries updated")
+    print(f"  - {stats['preserved']} existing entries preserved")
+    if removed:
+        print(f"  - {removed} entries removed")
+    if stats['duplicates']:
+        print(f"  - {stats['duplicates']} duplicates merged across different keys")
+    return stats
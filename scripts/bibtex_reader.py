@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+'''
+Streaming, low-memory reader for BibTeX files.
+
+The file is memory-mapped and scanned block by block, so only one entry is
+decoded and parsed at a time. Entries in the plain `field = {value}` style
+that ADS exports (and that this project writes) are handled by a small
+hand-written parser; anything it does not understand, such as string
+concatenation with `#`, is handed to bibtexparser one block at a time.
+Parsed entries have the same shape as bibtexparser's: lowercase field
+names, outer braces or quotes removed, and ENTRYTYPE/ID keys.
+'''
+
+import re
+import mmap
+from contextlib import contextmanager
+import bibtexparser
+from bibtexparser.bparser import BibTexParser
+from bibtexparser.bibdatabase import COMMON_STRINGS
+
+ENTRY_START = re.compile(rb'@\s*(\w+)\s*([{(])')
+LINE_ENTRY_START = re.compile(rb'\n[ \t]*@\s*\w+\s*[{(]')
+ENTRY_KEY = re.compile(rb'\s*([^,\s{}()]+)')
+BRACES = re.compile(rb'[{}()]')
+FRONT_MATTER = re.compile(rb'---\n(?:.*?\n)?---\n', re.DOTALL)
+NON_ENTRY_TYPES = {'comment', 'string', 'preamble'}
+
+FIELD_NAME = re.compile(r'\s*,?\s*([^\s=,{}"#()]+)\s*=\s*')
+BARE_VALUE = re.compile(r'[^\s,{}"#()]+')
+VALUE_BRACES = re.compile(r'[{}]')
+QUOTED_END = re.compile(r'[{}"]')
+TRAILER = re.compile(r'\s*,?\s*$')
+CONTINUATION = re.compile(r'\n[ \t]+')
+
+@contextmanager
+def open_bibtex(path):
+    """Memory-map a BibTeX file for scanning (yields b'' for an empty file)"""
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            yield b''
+            return
+        try:
+            yield data
+        finally:
+            data.close()
+
+def front_matter_end(data):
+    """Offset just past the Jekyll YAML front matter, or 0 if there is none"""
+    match = FRONT_MATTER.match(data)
+    return match.end() if match else 0
+
+def scan_bibtex_blocks(data, pos=0):
+    """Yield (entry_type, key, start, end) for each @-block in BibTeX bytes
+
+    Blocks are delimited by brace matching, so start:end is the exact span
+    of the block in the original data. Key is None for @comment, @string
+    and @preamble blocks. A block whose braces do not balance before the
+    next line starting with an @-entry is cut short there, with a warning,
+    so that one broken entry cannot swallow the rest of the file.
+    """
+    while True:
+        match = ENTRY_START.search(data, pos)
+        if not match:
+            return
+
+        # Braces are only matched up to the next line that starts a block
+        next_start = LINE_ENTRY_START.search(data, match.end())
+        limit = next_start.start() + 1 if next_start else len(data)
+
+        entry_type = match.group(1).decode('ascii').lower()
+        closer = b'}' if match.group(2) == b'{' else b')'
+        depth = 0
+        end = None
+        for brace in BRACES.finditer(data, match.end(), limit):
+            char = brace.group(0)
+            if char == b'{':
+                depth += 1
+            elif char == b'}':
+                if depth == 0 and closer == b'}':
+                    end = brace.end()
+                    break
+                depth -= 1
+            elif char == b')' and depth == 0 and closer == b')':
+                end = brace.end()
+                break
+
+        key = None
+        if entry_type not in NON_ENTRY_TYPES:
+            key_match = ENTRY_KEY.match(data, match.end())
+            if key_match:
+                key = key_match.group(1).decode('utf-8')
+
+        if end is None:
+            # Unbalanced or unterminated; resynchronise at the next block,
+            # leaving the blank lines before it out of this one
+            end = limit
+            while end > match.end() and data[end - 1:end] in (b' ', b'\t', b'\r', b'\n'):
+                end -= 1
+            line = data[:match.start()].count(b'\n') + 1
+            print(f"Warning: Unbalanced braces in @{entry_type}{{{key or ''}}} at line {line}; "
+                  "it may not be read correctly")
+
+        yield entry_type, key, match.start(), end
+        pos = end
+def _braced_value(text, pos):
+    """Return (value, end) for a {...} value starting at text[pos] == '{'"""
+    depth = 0
+    for brace in VALUE_BRACES.finditer(text, pos):
+        if brace.group(0) == '{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:brace.start()], brace.end()
+    raise ValueError("unbalanced braces")
+
+def _quoted_value(text, pos):
+    """Return (value, end) for a "..." value starting at text[pos] == '"'"""
+    depth = 0
+    for char in QUOTED_END.finditer(text, pos + 1):
+        if char.group(0) == '{':
+            depth += 1
+        elif char.group(0) == '}':
+            depth -= 1
+        elif depth == 0:
+            return text[pos + 1:char.start()], char.end()
+    raise ValueError("unterminated quoted value")
+
+def parse_entry(raw, strings=None):
+    """Parse the text of a single BibTeX entry into a dict
+
+    Returns None for text this parser does not handle, in which case the
+    caller should fall back to bibtexparser.
+    """
+    open_at = raw.find('{')
+    if open_at < 0 or not raw.rstrip().endswith('}'):
+        return None
+    entry_type = raw[1:open_at].strip().lower()
+    comma = raw.find(',', open_at)
+    if comma < 0:
+        return None
+
+    entry = {}
+    body_end = raw.rstrip().rfind('}')
+    pos = comma + 1
+    while True:
+        if TRAILER.match(raw, pos, body_end):
+            break
+        field = FIELD_NAME.match(raw, pos, body_end)
+        if not field:
+            return None
+        pos = field.end()
+
+        char = raw[pos:pos + 1]
+        if char in '{"':
+            try:
+                if char == '{':
+                    value, pos = _braced_value(raw, pos)
+                else:
+                    value, pos = _quoted_value(raw, pos)
+            except ValueError:
+                return None
+        else:
+            bare = BARE_VALUE.match(raw, pos, body_end)
+            if not bare:
+                return None
+            value = bare.group(0)
+            pos = bare.end()
+            if not value.isdigit():
+                name = value.lower()
+                if strings and name in strings:
+                    value = strings[name]
+                elif name in COMMON_STRINGS:
+                    value = COMMON_STRINGS[name]
+                else:
+                    return None
+
+        # Concatenation and other exotic syntax go to bibtexparser
+        rest = raw[pos:body_end].lstrip()
+        if rest and rest[0] != ',':
+            return None
+
+        if value == '{}':
+            value = ''
+        elif '\n' in value:
+            value = CONTINUATION.sub('\n', value)
+        entry[field.group(1).lower()] = value
+
+    entry['ENTRYTYPE'] = entry_type
+    entry['ID'] = raw[open_at + 1:comma].strip()
+    return entry
+
+def _parse_with_bibtexparser(raw, string_blocks):
+    """Parse a single block with bibtexparser, returning its entries"""
+    parser = BibTexParser()
+    return bibtexparser.loads("\n".join(string_blocks + [raw]), parser).entries
+
+def iter_bibtex_entries(data, pos=0, customization=None, unparsed=None):
+    """Yield (entry, start, end) for each entry in BibTeX bytes or a memory map
+
+    Entries are decoded and parsed one at a time; start:end is the span of
+    the entry's text in data. If unparsed is a list, (key, start, end) is
+    appended to it for each entry that could not be parsed, before the
+    next entry is yielded.
+    """
+    strings = {}
+    string_blocks = []
+    for entry_type, key, start, end in scan_bibtex_blocks(data, pos):
+        if entry_type == 'string':
+            raw = data[start:end].decode('utf-8')
+            string_blocks.append(raw)
+            strings.update(_parse_string_block(raw))
+            continue
+        if key is None:
+            continue
+
+        raw = data[start:end].decode('utf-8')
+        entry = parse_entry(raw, strings)
+        if entry is None:
+            parsed = _parse_with_bibtexparser(raw, string_blocks)
+            if not parsed:
+                if unparsed is not None:
+                    unparsed.append((key, start, end))
+                continue
+            entry = parsed[0]
+
+        if customization is not None:
+            entry = customization(entry)
+        yield entry, start, end
+
+def _parse_string_block(raw):
+    """Return [(name, value)] for a simple @string definition"""
+    match = re.match(r'@\s*string\s*[{(]\s*([^\s=]+)\s*=\s*', raw, re.IGNORECASE)
+    if not match:
+        return []
+    pos = match.end()
+    char = raw[pos:pos + 1]
+    try:
+        if char == '{':
+            value, _ = _braced_value(raw, pos)
+        elif char == '"':
+            value, _ = _quoted_value(raw, pos)
+        else:
+            return []
+    except ValueError:
+        return []
+    return [(match.group(1).lower(), value)]
+
+def read_bibtex_entries(path, customization=None):
+    """Yield entries from a BibTeX file one at a time with bounded memory"""
+    with open_bibtex(path) as data:
+        for entry, start, end in iter_bibtex_entries(data, front_matter_end(data), customization):
+            yield entry
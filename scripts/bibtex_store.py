@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+'''
+Local store of BibTeX entries previously exported from NASA ADS.
+
+Entries are keyed by bibcode together with a fingerprint of the ADS search
+document they were exported for, so a record is only exported again when
+ADS reports a change to its title, publication, volume, page or DOI.
+'''
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+import bibtex_merge
+
+FINGERPRINT_FIELDS = ["title", "pub", "volume", "page", "doi"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    bibcode TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    entry TEXT NOT NULL
+)
+"""
+
+def fingerprint_doc(doc):
+    """Hash the bibliographic fields of an ADS search document"""
+    fields = [doc.get(field) for field in FINGERPRINT_FIELDS]
+    encoded = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def entry_bibcode(entry):
+    """Return the bibcode of an entry exported from ADS"""
+    # ADS entries carry the bibcode in adsurl; the key is the bibcode by default
+    return bibtex_merge.entry_bibcode(entry) or entry.get('ID')
+
+class BibtexStore:
+    """SQLite-backed store of exported BibTeX entries by bibcode"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def get(self, bibcode, fingerprint):
+        """Return the stored entry if its fingerprint still matches, else None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fingerprint, entry FROM entries WHERE bibcode = ?",
+                (bibcode,)
+            ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return json.loads(row[1])
+
+    def put(self, bibcode, fingerprint, entry):
+        """Store a copy of an exported entry"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (bibcode, fingerprint, entry) VALUES (?, ?, ?)",
+                (bibcode, fingerprint, json.dumps(entry, sort_keys=True))
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
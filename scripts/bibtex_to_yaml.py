@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 import re
-import yaml
-import sys
 import os
+import json
+import hashlib
+import argparse
 from datetime import datetime
-import bibtexparser
-from bibtexparser.bparser import BibTexParser
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from bibtexparser.customization import convert_to_unicode
+from bibtex_reader import read_bibtex_entries
+from file_utils import atomic_write, file_hash, write_stream_if_changed, repo_path, cache_path
+from yaml_utils import load_yaml, dump_yaml, dump_yaml_list
+
+CHUNK_SIZE = 100  # Entries per task sent to a worker process with --jobs
+CACHE_PATH = cache_path("bibtex_to_yaml.json")  # Converted entries from previous runs
+GROUP_MEMBERS_PATH = repo_path('_data', 'group_members.yml')
 
 def expand_journal_name(abbrev):
     """Expand abbreviated journal names to their full titles"""
@@ -53,90 +61,161 @@ def expand_journal_name(abbrev):
     # Return the original name if no mapping found
     return abbrev
 
+# Handle LaTeX math subscripts/superscripts and $ delimiters. These rules
+# overlap, so they are applied in order, and only to text containing '$'.
+MATH_RULES = [
+    (re.compile(r'(\$_)(\{[^}]+\}|\d+)(\$)'), r'<sub>\2</sub>'),
+    (re.compile(r'(\$_)(\d+)(\$)'), r'<sub>\2</sub>'),
+    (re.compile(r'(\$\{\\rm )([^}]+)(\}\$)'), r'\2'),
+    (re.compile(r'\$([^$]+)\$'), r'\1'),
+    (re.compile(r'(\$\^)(\{[^}]+\}|\d+)(\$)'), r'<sup>\2</sup>'),
+    (re.compile(r'(\$\^)(\d+)(\$)'), r'<sup>\2</sup>'),
+]
+
+# Special characters and accents, in the order they used to be applied
+TEXT_SYMBOLS = [
+    ('textquoteright', "'"),
+    ('textquotedbl', '"'),
+    ('textquoteleft', "'"),
+    ('textendash', "–"),
+    ('textemdash', "—"),
+    ('textasciitilde', "~"),
+    ('textbackslash', "\\"),
+    ('textgreater', ">"),
+    ('textless', "<"),
+    ('textbar', "|"),
+]
+TEXT_WRAPPERS = {
+    'textbf': ('<b>', '</b>'),
+    'textit': ('<i>', '</i>'),
+    'textsuperscript': ('<sup>', '</sup>'),
+    'textsubscript': ('<sub>', '</sub>'),
+}
+LETTER_SYMBOLS = [
+    ('aa', "å"),
+    ('AA', "Å"),
+    ('o', "ø"),
+    ('O', "Ø"),
+    ('ae', "æ"),
+    ('AE', "Æ"),
+    ('ss', "ß"),
+    ('i', "ı"),
+    ('j', "ȷ"),
+    ('l', "ł"),
+    ('L', "Ł"),
+]
+SYMBOL_MAP = dict(TEXT_SYMBOLS + LETTER_SYMBOLS)
+
+# Accents are simplified by moving the mark after the letter (an acute
+# keeps its backslash, as it always has)
+ACCENT_SUFFIX = {'~': '~', '"': '"', "'": "\\'", '`': '`'}
+
+# Special handling for CO2 and similar patterns
+FORMULAS = {
+    'CO_2': 'CO<sub>2</sub>',
+    'CO$_2$': 'CO<sub>2</sub>',
+    'H$_2$O': 'H<sub>2</sub>O',
+}
+FORMULA_ALTERNATION = '|'.join(re.escape(formula) for formula in FORMULAS)
+
+# One alternation covering every non-math rule. Alternatives are listed in
+# the order the rules used to run, so the first one that matches at a
+# position is the one that would have won.
+LATEX_TOKEN = re.compile(
+    r'\\(?P<symbol>' + '|'.join(name for name, _ in TEXT_SYMBOLS) + r')'
+    r'|\\(?P<wrapper>' + '|'.join(TEXT_WRAPPERS) + r')\{(?P<content>[^}]+)\}'
+    r'|\\~\{(?P<tilde_braced>[a-zA-Z])\}'
+    r'|\\(?P<accent>[~"\'`])(?P<accented>[a-zA-Z])'
+    r'|\\(?P<letter>' + '|'.join(name for name, _ in LETTER_SYMBOLS) + r')'
+    # Formulae like CO_2 used to be converted before stray commands were
+    # stripped, so a command must not swallow the "CO" of a following CO_2
+    r'|(?P<formula>' + FORMULA_ALTERNATION + r')'
+    r'|\\(?=' + FORMULA_ALTERNATION + r')'
+    r'|\\(?P<command>(?:(?!' + FORMULA_ALTERNATION + r')[a-zA-Z])+)'
+    r'|[{}]'
+)
+WRAPPER_START = re.compile(r'\\(' + '|'.join(TEXT_WRAPPERS) + r')\{')
+NEEDS_TRANSLATION = re.compile(r'[\\${}]|CO_2')
+# \textbackslash, a double backslash and stacked accents make one rule's
+# output the input of another, which a single scan cannot reproduce
+SEQUENTIAL_ONLY = re.compile(r'\\textbackslash|\\\\|\\[~"\'`]\\')
+
+class _NeedsSequential(Exception):
+    """Raised for the rare inputs the single-pass translator cannot mirror"""
+
+def _translate_token(match):
+    group = match.lastgroup
+    if group == 'symbol' or group == 'letter':
+        return SYMBOL_MAP[match.group(group)]
+    if group == 'content':
+        content = match.group('content')
+        if WRAPPER_START.search(content):
+            raise _NeedsSequential()
+        opening, closing = TEXT_WRAPPERS[match.group('wrapper')]
+        return opening + LATEX_TOKEN.sub(_translate_token, content) + closing
+    if group == 'tilde_braced':
+        return match.group('tilde_braced') + '~'
+    if group == 'accented':
+        return match.group('accented') + ACCENT_SUFFIX[match.group('accent')]
+    if group == 'formula':
+        return FORMULAS[match.group('formula')]
+    if group == 'command':
+        return match.group('command')
+    # Braces, and a backslash in front of a formula
+    return ''
+
+def _latex_to_text_sequential(text):
+    """Apply the translation rules one after another over the whole string
+
+    Used for the rare text matching SEQUENTIAL_ONLY or containing nested
+    \\textbf-style commands, where the output of one rule feeds into the next.
+    """
+    for name, replacement in TEXT_SYMBOLS:
+        text = re.sub(r'\\' + name, replacement.replace('\\', '\\\\'), text)
+    for name, (opening, closing) in TEXT_WRAPPERS.items():
+        text = re.sub(r'\\' + name + r'\{([^}]+)\}', opening + r'\1' + closing, text)
+
+    text = re.sub(r'\\~\{([a-zA-Z])\}', r'\1~', text)
+    text = re.sub(r'\\~([a-zA-Z])', r'\1~', text)
+    text = re.sub(r'\\"([a-zA-Z])', r'\1"', text)
+    text = re.sub(r"\\'([a-zA-Z])", r"\1\\'", text)
+    text = re.sub(r'\\`([a-zA-Z])', r'\1`', text)
+
+    for name, replacement in LETTER_SYMBOLS:
+        text = re.sub(r'\\' + name, replacement, text)
+
+    for formula, replacement in FORMULAS.items():
+        text = text.replace(formula, replacement)
+    text = re.sub(r'\\([a-zA-Z]+)', r'\1', text)
+    return text.replace('{', '').replace('}', '')
+
+@lru_cache(maxsize=8192)
+def _latex_to_text_cached(text):
+    if '$' in text:
+        for pattern, replacement in MATH_RULES:
+            text = pattern.sub(replacement, text)
+
+    if not NEEDS_TRANSLATION.search(text):
+        return text
+
+    if SEQUENTIAL_ONLY.search(text):
+        return _latex_to_text_sequential(text)
+    try:
+        return LATEX_TOKEN.sub(_translate_token, text)
+    except _NeedsSequential:
+        return _latex_to_text_sequential(text)
+
 def latex_to_text(text):
     """Convert LaTeX symbols to HTML or Unicode equivalents."""
     if text is None:
         return ""
-    
-    # Handle LaTeX subscripts (e.g., CO$_2$ to CO<sub>2</sub>)
-    text = re.sub(r'(\$_)(\{[^}]+\}|\d+)(\$)', r'<sub>\2</sub>', text)
-    text = re.sub(r'(\$_)(\d+)(\$)', r'<sub>\2</sub>', text)
-    text = re.sub(r'(\$\{\\rm )([^}]+)(\}\$)', r'\2', text)
-    
-    # Remove LaTeX $ delimiters while preserving content
-    text = re.sub(r'\$([^$]+)\$', r'\1', text)
-    
-    # Handle LaTeX superscripts
-    text = re.sub(r'(\$\^)(\{[^}]+\}|\d+)(\$)', r'<sup>\2</sup>', text)
-    text = re.sub(r'(\$\^)(\d+)(\$)', r'<sup>\2</sup>', text)
-    
-    # Handle special characters and accents
-    replacements = {
-        r'\\textquoteright': "'",
-        r'\\textquotedbl': '"',
-        r'\\textquoteleft': "'",
-        r'\\textendash': "–",
-        r'\\textemdash': "—",
-        r'\\textasciitilde': "~",
-        r'\\textbackslash': "\\\\",  # Fixed escape sequence
-        r'\\textgreater': ">",
-        r'\\textless': "<",
-        r'\\textbar': "|",
-        r'\\textbf\{([^}]+)\}': r'<b>\1</b>',
-        r'\\textit\{([^}]+)\}': r'<i>\1</i>',
-        r'\\textsuperscript\{([^}]+)\}': r'<sup>\1</sup>',
-        r'\\textsubscript\{([^}]+)\}': r'<sub>\1</sub>',
-    }
-    
-    for pattern, replacement in replacements.items():
-        text = re.sub(pattern, replacement, text)
-    
-    # Handle special character accents separately with simpler patterns
-    text = re.sub(r'\\~\{([a-zA-Z])\}', r'\1~', text)  # Simplify tilde handling
-    text = re.sub(r'\\~([a-zA-Z])', r'\1~', text)  
-    text = re.sub(r'\\"([a-zA-Z])', r'\1"', text)  # Simplify umlaut
-    text = re.sub(r"\\'([a-zA-Z])", r'\1\'', text)  # Simplify acute
-    text = re.sub(r'\\`([a-zA-Z])', r'\1`', text)  # Simplify grave
-    text = re.sub(r'\\^([a-zA-Z])', r'\1^', text)  # Simplify circumflex
-    
-    # Replace common LaTeX symbols
-    more_replacements = {
-        r'\\aa': "å",
-        r'\\AA': "Å",
-        r'\\o': "ø",
-        r'\\O': "Ø",
-        r'\\ae': "æ",
-        r'\\AE': "Æ",
-        r'\\ss': "ß",
-        r'\\i': "ı",
-        r'\\j': "ȷ",
-        r'\\l': "ł",
-        r'\\L': "Ł",
-    }
-    
-    for pattern, replacement in more_replacements.items():
-        text = re.sub(pattern, replacement, text)
-    
-    # Special handling for CO2 and similar patterns
-    text = re.sub(r'CO_2', r'CO<sub>2</sub>', text)
-    text = re.sub(r'CO\$_2\$', r'CO<sub>2</sub>', text)
-    text = re.sub(r'H\$_2\$O', r'H<sub>2</sub>O', text)
-    
-    # Remove remaining LaTeX commands (simple ones that don't need special handling)
-    text = re.sub(r'\\([a-zA-Z]+)', r'\1', text)
-    
-    # Clean up any remaining curly braces
-    text = text.replace('{', '').replace('}', '')
-    
-    return text
+    return _latex_to_text_cached(text)
 
 def get_group_members():
     """Read group members from the YAML file."""
-    group_members_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                      '_data', 'group_members.yml')
     try:
-        with open(group_members_file, 'r') as f:
-            members_data = yaml.safe_load(f)
+        with open(GROUP_MEMBERS_PATH, 'r') as f:
+            members_data = load_yaml(f)
             members = []
             for member in members_data:
                 if 'name' in member:
@@ -149,9 +228,45 @@ def get_group_members():
         print(f"Warning: Could not load group members: {e}")
         return []
 
+HAYNE_PATTERN = re.compile(r'Hayne\b', re.IGNORECASE)
+HAYES_PATTERN = re.compile(r'Hayes\b', re.IGNORECASE)
+
 def is_hayne(author):
     """Check if an author is Paul Hayne using a strict pattern match"""
-    return bool(re.search(r'Hayne\b', author, re.IGNORECASE)) and not bool(re.search(r'Hayes\b', author, re.IGNORECASE))
+    return bool(HAYNE_PATTERN.search(author)) and not HAYES_PATTERN.search(author)
+
+class GroupMemberIndex:
+    """Precompiled matcher for group member names, built once per run
+
+    An author is a group member if any part (at least 4 characters long) of
+    a group member's name occurs in their lowercased APA-style name. Paul
+    Hayne's own full name is left out, since he is highlighted separately.
+    """
+
+    def __init__(self, group_members=()):
+        parts = set()
+        for member in group_members:
+            member = member.lower()
+            if "hayne" in member and "paul" in member:
+                continue
+            # Only parts of at least 4 characters, to avoid false positives
+            parts.update(part for part in member.split() if len(part) >= 4)
+
+        self.parts = frozenset(parts)
+        if parts:
+            self.pattern = re.compile('|'.join(re.escape(part) for part in sorted(parts)))
+        else:
+            self.pattern = None
+        self.cache = {}
+
+    def matches(self, author_apa):
+        """Return True if an APA-formatted author name belongs to a group member"""
+        if self.pattern is None:
+            return False
+        result = self.cache.get(author_apa)
+        if result is None:
+            result = self.cache[author_apa] = bool(self.pattern.search(author_apa.lower()))
+        return result
 
 def format_author_name_apa(author):
     """Format an author name in APA style: Last, F. M."""
@@ -180,7 +295,7 @@ def format_author_name_apa(author):
         initials = ' '.join([f"{n[0]}." for n in firsts if n])
         return f"{last}, {initials}"
 
-def format_author_name(author, group_members):
+def format_author_name(author, member_index):
     """Format an individual author name with appropriate styling."""
     # First convert to APA style
     author_apa = format_author_name_apa(author)
@@ -190,25 +305,13 @@ def format_author_name(author, group_members):
         return f"<b>Hayne, P. O.</b>"  # Consistent naming for Paul Hayne
     
     # Check if the author is a group member (other than Paul)
-    for member in group_members:
-        # Skip if member is Paul Hayne (handled above)
-        if "hayne" in member.lower() and "paul" in member.lower():
-            continue
-            
-        # Check if current author name contains or matches a group member name
-        member_parts = member.lower().split()
-        author_lower = author_apa.lower()
-        
-        # For each part of the member name (first name, last name)
-        for part in member_parts:
-            # Only match if part is at least 4 characters (to avoid false positives)
-            if len(part) >= 4 and part in author_lower:
-                # Use a lighter blue for group members
-                return f'<b><span style="color:#6495ED">{author_apa}</span></b>'
+    if member_index.matches(author_apa):
+        # Use a lighter blue for group members
+        return f'<b><span style="color:#6495ED">{author_apa}</span></b>'
     
     return author_apa
 
-def process_author_list(authors_string, group_members):
+def process_author_list(authors_string, member_index):
     """Process the author list to format names and handle et al."""
     if not authors_string:
         return ""
@@ -259,7 +362,7 @@ def process_author_list(authors_string, group_members):
             break
     
     # Format each author name
-    formatted_authors = [format_author_name(author, group_members) for author in authors]
+    formatted_authors = [format_author_name(author, member_index) for author in authors]
     
     # For longer lists, always show the first three authors, then "et al."
     if len(formatted_authors) > 3:
@@ -293,51 +396,173 @@ def clean_bibtex_authors(authors_string):
     
     return authors_string
 
-def convert_bibtex_to_yaml(bibtex_file, yaml_file):
-    """Convert BibTeX file to YAML."""
-    with open(bibtex_file) as bibfile:
-        parser = BibTexParser()
-        parser.customization = convert_to_unicode
-        bib_database = bibtexparser.load(bibfile, parser=parser)
-    
-    # Get group members for highlighting
-    group_members = get_group_members()
+def convert_entry(entry, member_index):
+    """Convert a single parsed BibTeX entry into a YAML-ready dict."""
+    entry = convert_to_unicode(entry)
+    yaml_entry = {}
+    
+    # Extract key information from the BibTeX entry
+    yaml_entry['key'] = entry.get('ID', '')
+    
+    # Clean up author names and apply formatting
+    authors = entry.get('author', '')
+    cleaned_authors = clean_bibtex_authors(authors)
+    yaml_entry['authors'] = process_author_list(cleaned_authors, member_index)
+    
+    # Process title with proper HTML conversions
+    title = entry.get('title', '')
+    # Remove the HTML link wrapping if present
+    title = re.sub(r'<a href="[^"]*" target="[^"]*">(.*?)</a>', r'\1', title)
+    yaml_entry['title'] = latex_to_text(title)
+    
+    # Process other fields
+    for field in ['year', 'month', 'volume', 'number', 'pages', 'doi']:
+        if field in entry:
+            yaml_entry[field] = latex_to_text(entry[field])
+    
+    # Process journal name separately to expand abbreviations
+    if 'journal' in entry:
+        journal = latex_to_text(entry['journal'])
+        yaml_entry['journal'] = expand_journal_name(journal)
+    
+    # Add URL
+    if 'doi' in yaml_entry:
+        yaml_entry['url'] = f"https://doi.org/{yaml_entry['doi']}"
+    elif 'adsurl' in entry:
+        yaml_entry['url'] = latex_to_text(entry['adsurl'])
+    
+    return yaml_entry
+
+# Group member index of a worker process, set once by _init_worker
+_worker_member_index = None
+
+def _init_worker(member_index):
+    global _worker_member_index
+    _worker_member_index = member_index
+
+def _convert_chunk(entries):
+    return [convert_entry(entry, _worker_member_index) for entry in entries]
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def convert_entries(bibtex_entries, member_index, jobs=1):
+    """Convert parsed entries in order, in a pool of jobs processes if jobs > 1"""
+    if jobs <= 1:
+        return [convert_entry(entry, member_index) for entry in bibtex_entries]
     
     entries = []
-    for entry in bib_database.entries:
-        yaml_entry = {}
-        
-        # Extract key information from the BibTeX entry
-        yaml_entry['key'] = entry.get('ID', '')
-        
-        # Clean up author names and apply formatting
-        authors = entry.get('author', '')
-        cleaned_authors = clean_bibtex_authors(authors)
-        yaml_entry['authors'] = process_author_list(cleaned_authors, group_members)
-        
-        # Process title with proper HTML conversions
-        title = entry.get('title', '')
-        # Remove the HTML link wrapping if present
-        title = re.sub(r'<a href="[^"]*" target="[^"]*">(.*?)</a>', r'\1', title)
-        yaml_entry['title'] = latex_to_text(title)
-        
-        # Process other fields
-        for field in ['year', 'month', 'volume', 'number', 'pages', 'doi']:
-            if field in entry:
-                yaml_entry[field] = latex_to_text(entry[field])
-        
-        # Process journal name separately to expand abbreviations
-        if 'journal' in entry:
-            journal = latex_to_text(entry['journal'])
-            yaml_entry['journal'] = expand_journal_name(journal)
-        
-        # Add URL
-        if 'doi' in yaml_entry:
-            yaml_entry['url'] = f"https://doi.org/{yaml_entry['doi']}"
-        elif 'adsurl' in entry:
-            yaml_entry['url'] = latex_to_text(entry['adsurl'])
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(member_index,)) as executor:
+        for chunk in executor.map(_convert_chunk, _chunked(bibtex_entries, CHUNK_SIZE)):
+            entries.extend(chunk)
+    return entries
+
+def converter_version():
+    """Hash of this script, so cached entries are dropped whenever it changes"""
+    return file_hash(os.path.abspath(__file__))
+
+class ConversionCache:
+    """Converted YAML entries from previous runs, keyed by entry content
+
+    Cached entries are only valid for the same converter and the same group
+    roster (which decides author highlighting); the whole cache is dropped
+    if either has changed. Entries not used in a run are pruned on save,
+    after which the same cache can be used for another run.
+    """
+
+    def __init__(self, path, roster_hash):
+        self.path = path
+        self.version = converter_version()
+        self.roster_hash = roster_hash
+        self.entries = {}
+        self.used = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable conversion cache {path}: {e}")
+            return
+        if data.get('version') == self.version and data.get('roster') == self.roster_hash:
+            self.entries = data.get('entries', {})
+
+    @staticmethod
+    def key(entry):
+        """Hash of the fields of a BibTeX entry as read from the file"""
+        encoded = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        yaml_entry = self.entries.get(key)
+        if yaml_entry is not None:
+            self.used[key] = yaml_entry
+        return yaml_entry
+
+    def put(self, key, yaml_entry):
+        self.used[key] = yaml_entry
+
+    def save(self):
+        data = {'version': self.version, 'roster': self.roster_hash, 'entries': self.used}
+        try:
+            atomic_write(self.path, json.dumps(data, ensure_ascii=False))
+        except OSError as e:
+            print(f"Warning: Could not save conversion cache {self.path}: {e}")
+        self.entries, self.used = self.used, {}
+
+def convert_bibtex_to_yaml(bibtex_file, yaml_file, jobs=1, cache_path=CACHE_PATH, stream=False,
+                           member_index=None, cache=None):
+    """Convert BibTeX file to YAML.
+
+    Entries unchanged since the last run are taken from the conversion
+    cache at cache_path (None disables it); only new or changed entries go
+    through the author and LaTeX pipeline. With jobs > 1 those are converted
+    in chunks by a pool of worker processes. Results are kept in file order,
+    so the output is identical to a sequential, uncached run.
+
+    With stream=True the entries are sorted in place and dumped one at a
+    time, instead of as a single document. The YAML file is left untouched
+    if nothing but the generation date would change.
+
+    A GroupMemberIndex and a ConversionCache can be passed in to keep them
+    in memory across calls, as the pipeline's watch mode does.
+    """
+    # Index group member names once for highlighting
+    if member_index is None:
+        member_index = GroupMemberIndex(get_group_members())
+    if cache is None and cache_path:
+        cache = ConversionCache(cache_path, file_hash(GROUP_MEMBERS_PATH))
+    
+    # Entries are read one at a time from the memory-mapped file; LaTeX is
+    # converted to Unicode later, and only for entries not in the cache
+    bibtex_entries = read_bibtex_entries(bibtex_file)
+    if cache is None:
+        entries = convert_entries(bibtex_entries, member_index, jobs)
+    else:
+        entries = []
+        pending = []
+        for entry in bibtex_entries:
+            key = cache.key(entry)
+            yaml_entry = cache.get(key)
+            if yaml_entry is None:
+                pending.append((len(entries), key, entry))
+            entries.append(yaml_entry)
         
-        entries.append(yaml_entry)
+        converted = convert_entries([entry for _, _, entry in pending], member_index, jobs)
+        for (position, key, _), yaml_entry in zip(pending, converted):
+            entries[position] = yaml_entry
+            cache.put(key, yaml_entry)
+        cache.save()
+        print(f"Reused {len(entries) - len(pending)} cached entries, converted {len(pending)}")
     
     # Sort entries by year (descending) and then by month
     month_order = {'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6, 
@@ -349,21 +574,36 @@ def convert_bibtex_to_yaml(bibtex_file, yaml_file):
         month = month_order.get(month_str, 0)
         return (-year, -month)  # Negative to sort in descending order
     
-    sorted_entries = sorted(entries, key=entry_sort_key)
-    
-    # Write to YAML file
-    with open(yaml_file, 'w') as outfile:
-        outfile.write(f"# Generated from {os.path.basename(bibtex_file)} on {datetime.now().strftime('%Y-%m-%d')}\n")
-        yaml.dump(sorted_entries, outfile, default_flow_style=False, sort_keys=False)
-    
-    print(f"Converted {len(entries)} entries from {bibtex_file} to {yaml_file}")
+    # Render the YAML straight to disk, keeping it only if more than the date changed
+    def write_yaml(output):
+        output.write(f"# Generated from {os.path.basename(bibtex_file)} on {datetime.now().strftime('%Y-%m-%d')}\n")
+        if stream:
+            entries.sort(key=entry_sort_key)
+            dump_yaml_list(entries, output, default_flow_style=False, sort_keys=False)
+        else:
+            sorted_entries = sorted(entries, key=entry_sort_key)
+            dump_yaml(sorted_entries, output, default_flow_style=False, sort_keys=False)
+    
+    if write_stream_if_changed(yaml_file, write_yaml):
+        print(f"Converted {len(entries)} entries from {bibtex_file} to {yaml_file}")
+    else:
+        print(f"Converted {len(entries)} entries from {bibtex_file}; {yaml_file} unchanged")
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Convert a BibTeX file to YAML for the publications page")
+    parser.add_argument("bibtex_file", help="input BibTeX file")
+    parser.add_argument("yaml_file", help="output YAML file")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="convert entries in N worker processes (0 uses every CPU; default 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="convert every entry instead of reusing unchanged ones from the last run")
+    parser.add_argument("--stream", action="store_true",
+                        help="write sorted entries to the output one at a time instead of as one document")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python bibtex_to_yaml.py input.bib output.yml")
-        sys.exit(1)
-    
-    bibtex_file = sys.argv[1]
-    yaml_file = sys.argv[2]
-    
-    convert_bibtex_to_yaml(bibtex_file, yaml_file)
\ No newline at end of file
+    args = parse_args()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    convert_bibtex_to_yaml(args.bibtex_file, args.yaml_file, jobs=jobs,
+                           cache_path=None if args.no_cache else CACHE_PATH, stream=args.stream)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+'''
+Check latex_to_text against a golden corpus of input/expected-output pairs.
+
+The expected outputs in golden/latex_to_text.json were produced by the
+original implementation, which applied each translation rule to the whole
+string in turn. The single-pass translator must reproduce them exactly,
+including for the inputs it hands back to the rule-by-rule fallback
+(SEQUENTIAL_ONLY text and nested \\textbf-style commands). Prints every
+mismatch and exits with status 1 if there is any.
+'''
+
+import os
+import sys
+import json
+import argparse
+from bibtex_to_yaml import latex_to_text, LATEX_TOKEN, MATH_RULES, SEQUENTIAL_ONLY, _translate_token, _NeedsSequential
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'latex_to_text.json')
+
+def translation_path(text):
+    """Name the route latex_to_text takes for text: single-pass or sequential"""
+    if '$' in text:
+        for pattern, replacement in MATH_RULES:
+            text = pattern.sub(replacement, text)
+    if SEQUENTIAL_ONLY.search(text):
+        return 'sequential-only'
+    try:
+        LATEX_TOKEN.sub(_translate_token, text)
+    except _NeedsSequential:
+        return 'needs-sequential'
+    return 'single-pass'
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Check latex_to_text against the golden corpus")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="golden corpus JSON (default %(default)s)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    with open(args.golden, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+
+    counts = {}
+    failures = 0
+    for case in cases:
+        path = translation_path(case['input'])
+        counts[path] = counts.get(path, 0) + 1
+        actual = latex_to_text(case['input'])
+        if actual != case['expected']:
+            failures += 1
+            print(f"Mismatch ({path}): {case['input']!r}")
+            print(f"  expected {case['expected']!r}")
+            print(f"  got      {actual!r}")
+
+    summary = ", ".join(f"{count} {path}" for path, count in sorted(counts.items()))
+    print(f"{len(cases) - failures}/{len(cases)} cases match ({summary})")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+'''
+Single-pass reader for the publication lists in the LaTeX CV.
+
+The CV is tokenised once from start to finish. Only the tokens that matter
+for the structure are looked at: comments, braces, section headings, year
+markers, and \\item and \\end{enumerate}. The reader tracks brace depth and
+the current section and year, and emits one record per \\item of the
+requested section. Item text runs to the next \\item or \\end{enumerate}
+at the same depth, or to the brace closing the group the item is in. That
+covers both the `\\item{\\small ...}` and the `{\\small \\item ... \\item ...}`
+styles used in the CV. There is no backtracking, so the cost is linear in
+the length of the file.
+'''
+
+import re
+from collections import namedtuple
+
+REFEREED_SECTION = "Refereed Journal Articles"
+
+CVItem = namedtuple('CVItem', ['year', 'text'])
+
+CV_TOKEN = re.compile(r'''
+    (?P<comment>%[^\n]*)
+  | (?P<escaped>\\[{}%\\])
+  | (?P<heading>\\large\s*\\textcolor\{darkgray\}\{(?P<title>[^{}]*)\})
+  | (?P<year>\\textcolor\{darkgray\}\{(?P<year_value>\d{4})\})
+  | (?P<item>\\item(?![A-Za-z]))
+  | (?P<end>\\end\{enumerate\})
+  | (?P<open>\{)
+  | (?P<close>\})
+''', re.VERBOSE)
+
+SMALL_WRAPPER = re.compile(r'\s*\{\s*\\small(?![A-Za-z])')
+
+class _OpenItem:
+    """An \\item whose end has not been reached yet"""
+
+    def __init__(self, start, depth, wrapped):
+        self.start = start
+        self.depth = depth
+        self.wrapped = wrapped
+        self.wrapper_end = None
+
+    def text(self, text, end):
+        """Text of the item, without a {\\small ...} group wrapping all of it"""
+        if self.wrapper_end is not None:
+            end = self.wrapper_end
+        return text[self.start:end].strip()
+
+def iter_cv_items(text, section=REFEREED_SECTION):
+    """Yield a CVItem(year, text) for each \\item of a CV section
+
+    section is matched as a substring of the section heading titles,
+    e.g. "Paul O. Hayne: Refereed Journal Articles".
+    """
+    in_section = False
+    year = None
+    depth = 0
+    item = None
+
+    for token in CV_TOKEN.finditer(text):
+        kind = token.lastgroup
+        if kind in ('comment', 'escaped'):
+            continue
+
+        if kind == 'open':
+            depth += 1
+            continue
+
+        if kind == 'close':
+            depth -= 1
+            if item is not None:
+                if depth < item.depth:
+                    # The group containing the item has ended
+                    yield CVItem(year, item.text(text, token.start()))
+                    item = None
+                elif depth == item.depth and item.wrapped and item.wrapper_end is None:
+                    item.wrapper_end = token.start()
+            continue
+
+        # Headings and year markers end the current item, and so do \\item
+        # and \\end{enumerate} at the item's own level
+        if item is not None and (kind in ('heading', 'year') or depth <= item.depth):
+            yield CVItem(year, item.text(text, token.start()))
+            item = None
+
+        if kind == 'heading':
+            in_section = section in token.group('title')
+            year = None
+        elif kind == 'year':
+            year = token.group('year_value')
+        elif kind == 'item' and in_section:
+            wrapper = SMALL_WRAPPER.match(text, token.end())
+            if wrapper:
+                item = _OpenItem(wrapper.end(), depth, True)
+            else:
+                item = _OpenItem(token.end(), depth, False)
+
+    if item is not None:
+        yield CVItem(year, item.text(text, len(text)))
+
+def read_cv_items(path, section=REFEREED_SECTION):
+    """Return the CVItems of a section of a LaTeX CV file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_cv_items(f.read(), section))
@@ -6,87 +6,87 @@ the BibTeX file for a Jekyll website using the al-folio theme.
 
 import os
 import re
-import bibtexparser
-from bibtexparser.bparser import BibTexParser
-from bibtexparser.bwriter import BibTexWriter
+import json
+import argparse
 from datetime import datetime
+from collections import Counter
+import bibtex_merge
+from bibtex_merge import preserve_links_policy
+from cv_reader import read_cv_items
+from file_utils import atomic_write, content_hash, file_hash, repo_path, cache_path
 
 # Configuration
-CV_PATH = "../assets/files/Hayne-CV/main.tex"
-BIBTEX_PATH = "../_bibliography/papers.bib"
+CV_PATH = repo_path("assets", "files", "Hayne-CV", "main.tex")
+BIBTEX_PATH = repo_path("_bibliography", "papers.bib")
+STATE_PATH = cache_path("cv_to_bibtex.json")  # Hash and citation key of each CV item last synced
+
+# Markers of student (G, U) and postdoc (P) authors, removed from the text
+STUDENT_MARKERS = [
+    '\\textcolor{darkred}{$^*$(G)',
+    '\\textcolor{darkred}{$^*$(U)',
+    '\\textcolor{blue}{$^*$(P)',
+]
+_MARKERS = '|'.join(re.escape(marker) for marker in STUDENT_MARKERS)
+MARKUP = re.compile(_MARKERS + r'|\\(?:textbf|textit|href)\{|\}|(?P<command>\\\w+)')
+_MARKER_PREFIXES = '|'.join(sorted({re.escape(marker[:i]) for marker in STUDENT_MARKERS
+                                     for i in range(1, len(marker))}, key=len, reverse=True))
+JOINED_MARKUP = re.compile(r'\\\w*(?:\}|\\(?:textbf|textit|href)\{|' + _MARKERS + ')'
+                           r'|(?:' + _MARKER_PREFIXES + ')(?:' + _MARKERS + ')')
+WHITESPACE = re.compile(r'\s+')
 
 def extract_publications_from_cv():
     """Extract publication entries from the CV LaTeX file"""
     print(f"Reading CV file from {CV_PATH}...")
     
     try:
-        with open(CV_PATH, 'r', encoding='utf-8') as f:
-            cv_content = f.read()
+        items = read_cv_items(CV_PATH)
     except Exception as e:
         print(f"Error reading CV file: {e}")
         return []
     
-    # Find the publications section
-    pubs_pattern = r"\\hrulefill\s*\\vspace\{0\.1in\}\\\\\\{\\large\\textcolor\{darkgray\}\{Paul O\. Hayne: Refereed Journal Articles\}\}(.*?)\\noindent"
-    pubs_match = re.search(pubs_pattern, cv_content, re.DOTALL)
-    
-    if not pubs_match:
-        print("Publications section not found in CV. Searching for alternative section markers...")
-        # Try alternative markers
-        alt_pattern = r"\\noindent\s*\\begin\{longtable\}.*?\\textcolor\{darkgray\}\{(2\d{3})\}(.*?)\\end\{longtable\}"
-        pub_years = re.findall(alt_pattern, cv_content, re.DOTALL)
-        
-        if not pub_years:
-            print("Could not find publications section in CV.")
-            return []
-        
-        print(f"Found publications from years: {[year for year, _ in pub_years]}")
-        
-        # Extract publications by year
-        all_pubs = []
-        for year, year_content in pub_years:
-            # Extract individual publications using item pattern
-            pub_pattern = r"\\item\{\\small(.*?)(?=\\item\{|$)"
-            year_pubs = re.findall(pub_pattern, year_content, re.DOTALL)
-            
-            print(f"Found {len(year_pubs)} publications for year {year}")
-            for pub in year_pubs:
-                all_pubs.append((year, pub.strip()))
-        
-        return all_pubs
-    
-    pubs_content = pubs_match.group(1)
-    
-    # Extract publications by year
-    year_pattern = r"\\noindent\\textcolor\{darkgray\}\{(\d{4})\}(.*?)(?=\\noindent\\textcolor\{darkgray\}\{|\Z)"
-    pub_years = re.findall(year_pattern, pubs_content, re.DOTALL)
+    if not items:
+        print("Could not find publications section in CV.")
+        return []
     
-    all_pubs = []
-    for year, year_content in pub_years:
-        # Extract individual publications using item pattern
-        pub_pattern = r"\\item\{\\small(.*?)(?=\\item\{|$)"
-        year_pubs = re.findall(pub_pattern, year_content, re.DOTALL)
-        
-        print(f"Found {len(year_pubs)} publications for year {year}")
-        for pub in year_pubs:
-            all_pubs.append((year, pub.strip()))
+    counts = Counter(item.year for item in items)
+    for year in sorted(counts, key=lambda year: year or '', reverse=True):
+        print(f"Found {counts[year]} publications for year {year}")
     
-    print(f"Total publications found: {len(all_pubs)}")
-    return all_pubs
+    print(f"Total publications found: {len(items)}")
+    return items
 
-def parse_publication(year, pub_text):
-    """Parse a publication entry from CV to extract components"""
-    # Clean up LaTeX commands and symbols
-    pub_text = pub_text.replace('\\textcolor{darkred}{$^*$(G)', '')
-    pub_text = pub_text.replace('\\textcolor{darkred}{$^*$(U)', '')
-    pub_text = pub_text.replace('\\textcolor{blue}{$^*$(P)', '')
+def _clean_publication_text_sequential(pub_text):
+    """Reference cleanup, one rule at a time, for text where rules interact"""
+    for marker in STUDENT_MARKERS:
+        pub_text = pub_text.replace(marker, '')
     pub_text = pub_text.replace('}', '')
     pub_text = pub_text.replace('\\textbf{', '')
     pub_text = pub_text.replace('\\textit{', '')
     pub_text = pub_text.replace('\\href{', '')
-    pub_text = pub_text.replace('}{', ' ')
     pub_text = re.sub(r'\\\w+', ' ', pub_text)  # Remove other LaTeX commands
-    pub_text = re.sub(r'\s+', ' ', pub_text)    # Normalize whitespace
+    pub_text = pub_text.replace('{', '')        # Braces left open by the above
+    return WHITESPACE.sub(' ', pub_text)        # Normalize whitespace
+
+def clean_publication_text(pub_text):
+    """Strip LaTeX markup from a CV item in a single pass
+    
+    Removes the student/postdoc markers, closing braces and the \\textbf,
+    \\textit and \\href openers, and turns other commands into spaces.
+    Opening braces left over after that are dropped as well, since they
+    would leave the BibTeX fields unbalanced.
+    Text where one removal would join the pieces around it into a new
+    command (e.g. a command directly followed by a brace) is cleaned rule
+    by rule instead, so the result is always the same.
+    """
+    if JOINED_MARKUP.search(pub_text):
+        return _clean_publication_text_sequential(pub_text)
+    pub_text = MARKUP.sub(lambda match: ' ' if match.lastgroup == 'command' else '', pub_text)
+    return WHITESPACE.sub(' ', pub_text.replace('{', ''))
+
+def parse_publication(year, pub_text):
+    """Parse a publication entry from CV to extract components"""
+    # Clean up LaTeX commands and symbols
+    pub_text = clean_publication_text(pub_text)
     
     # Extract authors - usually everything before the year in parentheses
     authors_match = re.search(r'^(.*?)\((\d{4})\)', pub_text)
@@ -97,7 +97,7 @@ def parse_publication(year, pub_text):
     pub_year = authors_match.group(2)
     
     # Extract title - usually between year and journal
-    rest = pub_text[authors_match.end():].strip()
+    rest = pub_text[authors_match.end():].lstrip(' ,')
     title_journal_match = re.search(r'(.*?),\s*(.*?)(?:,|$)', rest)
     
     if not title_journal_match:
@@ -140,131 +140,160 @@ def parse_publication(year, pub_text):
         'pages': pages
     }
 
-def generate_bibtex_entries(publications):
-    """Generate BibTeX entries from parsed publications"""
-    print("Generating BibTeX entries...")
-    bibtex_entries = []
+def generate_bibtex_entry(pub_data, keys, previous_key=None):
+    """Build the BibTeX entry for a parsed publication, allocating its key
     
-    for i, (year, pub_text) in enumerate(publications):
-        pub_data = parse_publication(year, pub_text)
-        
-        if not pub_data:
-            print(f"Failed to parse publication {i+1}")
-            continue
-        
-        # Create unique key if duplicates exist
-        base_key = pub_data['key']
-        key = base_key
-        suffix_idx = 0
-        while any(entry.get('ID') == key for entry in bibtex_entries):
-            suffix_idx += 1
-            key = f"{base_key}{chr(96 + suffix_idx)}"  # a, b, c, ...
-        
-        # Create the BibTeX entry
-        entry = {
-            'ID': key,
-            'ENTRYTYPE': 'article',
-            'title': f"{{{pub_data['title']}}}",
-            'author': pub_data['authors'],
-            'journal': pub_data['journal'],
-            'year': pub_data['year'],
-        }
-        
-        # Add optional fields if available
-        if pub_data['volume']:
-            entry['volume'] = pub_data['volume']
-        
-        if pub_data['number']:
-            entry['number'] = pub_data['number']
-        
-        if pub_data['pages']:
-            entry['pages'] = pub_data['pages']
-        
-        bibtex_entries.append(entry)
+    previous_key is the key the same CV item was given before, which is
+    kept if it is still free.
+    """
+    # Create unique key if duplicates exist (a, b, c, ..., z, aa, ab, ...)
+    if previous_key and keys.claim(previous_key):
+        key = previous_key
+    else:
+        key = keys.allocate(pub_data['key'], pub_data['title'])
     
-    return bibtex_entries
-
-def update_bibtex_file(bibtex_entries):
-    """Update the BibTeX file with new entries, preserving existing links"""
-    print("Updating BibTeX file...")
-    existing_entries = {}
+    # Create the BibTeX entry
+    entry = {
+        'ID': key,
+        'ENTRYTYPE': 'article',
+        'title': f"{{{pub_data['title']}}}",
+        'author': pub_data['authors'],
+        'journal': pub_data['journal'],
+        'year': pub_data['year'],
+    }
     
-    # Read existing BibTeX file if it exists
-    if os.path.exists(BIBTEX_PATH):
-        with open(BIBTEX_PATH, 'r') as f:
-            content = f.read()
-            # Extract YAML front matter
-            yaml_match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
-            yaml_header = yaml_match.group(0) if yaml_match else "---\n---\n\n"
-            
-            # Parse existing entries
-            parser = BibTexParser()
-            bib_database = bibtexparser.loads(content.replace(yaml_header, ""), parser)
-            
-            for entry in bib_database.entries:
-                existing_entries[entry.get('ID')] = entry
-    else:
-        yaml_header = "---\n---\n\n"
+    # Add optional fields if available
+    if pub_data['volume']:
+        entry['volume'] = pub_data['volume']
     
-    print(f"Found {len(existing_entries)} existing entries.")
+    if pub_data['number']:
+        entry['number'] = pub_data['number']
     
-    # Merge new entries with existing ones
-    merged_entries = []
-    new_count = 0
-    updated_count = 0
-    preserved_count = 0
+    if pub_data['pages']:
+        entry['pages'] = pub_data['pages']
     
-    for entry in bibtex_entries:
-        key = entry.get('ID')
-        if key in existing_entries:
-            # If this entry already exists, preserve any custom fields
-            existing = existing_entries[key]
-            
-            # Preserve title with links from existing entry if it has links
-            if '<a href=' in existing.get('title', ''):
-                entry['title'] = existing['title']
-            else:
-                # Add links to title if we have a URL but the existing entry doesn't have links
-                entry['title'] = f"{{<a href=\"\" target=\"\\_\">{entry['title'].strip('{}')}</a>}}"
-            
-            # Copy any additional fields from existing entry
-            for field_key, value in existing.items():
-                if field_key not in entry and field_key not in ['ID', 'ENTRYTYPE']:
-                    entry[field_key] = value
-            
-            updated_count += 1
-            del existing_entries[key]
-        else:
-            # For new entries, add placeholder link
-            entry['title'] = f"{{<a href=\"\" target=\"\\_\">{entry['title'].strip('{}')}</a>}}"
-            new_count += 1
-        
-        merged_entries.append(entry)
+    return entry
+
+def item_hash(year, pub_text):
+    """Hash identifying the text of a CV item and the year it is listed under"""
+    return content_hash(f"{year}\n{pub_text}")
+
+def sync_version():
+    """Hash of the CV parsing code; items are all re-parsed when it changes"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return content_hash("".join(file_hash(os.path.join(directory, name)) or ""
+                                for name in ("cv_to_bibtex.py", "cv_reader.py")))
+
+class SyncState:
+    """The CV items synced by the last run and the citation keys they became
+
+    Items are keyed by item_hash; a key of None records an item that could
+    not be parsed. The hash of the BibTeX file as written by the last run is
+    kept too, so a run can tell when something else has changed the file.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self.version = sync_version()
+        self.items = {}
+        self.bibtex_hash = None
+        self.current = False  # Whether the items were synced by this version
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable sync state {path}: {e}")
+            return
+        self.items = data.get('items', {})
+        self.bibtex_hash = data.get('bibtex')
+        self.current = data.get('version') == self.version
+
+    def save(self, bibtex_hash):
+        data = {'version': self.version, 'bibtex': bibtex_hash, 'items': self.items}
+        try:
+            atomic_write(self.path, json.dumps(data, indent=1, sort_keys=True))
+        except OSError as e:
+            print(f"Warning: Could not save sync state {self.path}: {e}")
+
+def placeholder_link(title):
+    """Wrap a title in an empty link for the DOI to be filled in later"""
+    return f"{{<a href=\"\" target=\"\\_\">{title.strip('{}')}</a>}}"
+
+def cv_merge_policy(incoming, existing):
+    """Keep linked titles from the BibTeX file; give other titles a placeholder link"""
+    merged = preserve_links_policy(incoming, existing)
+    if existing is None or '<a href=' not in existing.get('title', ''):
+        merged['title'] = placeholder_link(incoming['title'])
+    return merged
+
+def update_bibtex_file(bibtex_entries):
+    """Update the BibTeX file with new entries, preserving existing links"""
+    return bibtex_merge.update_bibtex_file(BIBTEX_PATH, bibtex_entries, policy=cv_merge_policy)
+
+def sync_publications(publications, state):
+    """Bring the BibTeX file up to date with the CV items that have changed
     
-    # Add any remaining existing entries that weren't in the new entries
-    for key, entry in existing_entries.items():
-        merged_entries.append(entry)
-        preserved_count += 1
+    Only items whose hash is not in the sync state are parsed and merged,
+    and entries made from items that are no longer in the CV are removed.
+    When neither the CV items nor the BibTeX file have changed since the
+    last run, the BibTeX file is not even read.
+    """
+    items = {}
+    for year, pub_text in publications:
+        items.setdefault(item_hash(year, pub_text), (year, pub_text))
     
-    # Sort entries by year (descending)
-    merged_entries.sort(key=lambda x: int(x.get('year', '0')), reverse=True)
+    changed = [h for h in items if h not in state.items or not state.current]
+    removed = [h for h in state.items if h not in items]
+    bibtex_hash = file_hash(BIBTEX_PATH)
+    if not changed and not removed and bibtex_hash == state.bibtex_hash:
+        print(f"CV unchanged since the last sync ({len(items)} publications); nothing to do.")
+        return
     
-    # Write the updated BibTeX file
-    writer = BibTexWriter()
-    writer.indent = '  '
-    bib_database = bibtexparser.bibdatabase.BibDatabase()
-    bib_database.entries = merged_entries
+    _, existing_entries = bibtex_merge.read_bibtex_file(BIBTEX_PATH)
+    if bibtex_hash != state.bibtex_hash:
+        # The file was changed elsewhere; restore entries that have gone missing
+        existing_keys = {entry['ID'] for entry in existing_entries}
+        pending = set(changed)
+        changed.extend(h for h in items if h not in pending and state.items.get(h)
+                       and state.items[h] not in existing_keys)
     
-    with open(BIBTEX_PATH, 'w') as f:
-        f.write(yaml_header)
-        f.write(writer.write(bib_database))
+    # Keys of removed items are released, so an edited item can keep its key
+    remove_keys = {state.items[h] for h in removed} - {None}
+    for h in removed:
+        del state.items[h]
+    remove_keys -= set(state.items.values())
+    keys = bibtex_merge.KeyAllocator(entry for entry in existing_entries
+                                     if entry['ID'] not in remove_keys)
     
-    print(f"Successfully updated {BIBTEX_PATH} with {len(merged_entries)} publications:")
-    print(f"  - {new_count} new entries added")
-    print(f"  - {updated_count} existing entries updated")
-    print(f"  - {preserved_count} existing entries preserved")
+    print(f"Parsing {len(changed)} new or changed publications "
+          f"({len(items) - len(changed)} unchanged, {len(removed)} removed)...")
+    bibtex_entries = []
+    for h in changed:
+        pub_data = parse_publication(*items[h])
+        if not pub_data:
+            print(f"Failed to parse publication: {items[h][1][:80]}")
+            state.items[h] = None
+            continue
+        entry = generate_bibtex_entry(pub_data, keys, state.items.get(h))
+        state.items[h] = entry['ID']
+        bibtex_entries.append(entry)
+    
+    bibtex_merge.update_bibtex_file(BIBTEX_PATH, bibtex_entries, policy=cv_merge_policy,
+                                    remove_keys=remove_keys)
+    state.save(file_hash(BIBTEX_PATH))
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Update the BibTeX file from the publications in the LaTeX CV")
+    parser.add_argument("--full", action="store_true",
+                        help="parse and merge every publication instead of only those changed since the last run")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     try:
         # Extract publications from CV
         publications = extract_publications_from_cv()
@@ -273,15 +302,11 @@ def main():
             print("No publications were extracted. Exiting.")
             return
         
-        # Generate BibTeX entries
-        bibtex_entries = generate_bibtex_entries(publications)
-        
-        if not bibtex_entries:
-            print("No BibTeX entries generated. Exiting.")
-            return
-        
-        # Update BibTeX file
-        update_bibtex_file(bibtex_entries)
+        # Parse and merge only the publications changed since the last run
+        state = SyncState()
+        if args.full:
+            state.current = False
+        sync_publications(publications, state)
         
         print("Publication update completed successfully.")
         
@@ -293,4 +318,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+'''
+Helpers for writing generated files safely.
+
+Generated files are only rewritten when their content has meaningfully
+changed, so unchanged pages do not trigger a Jekyll rebuild or a GitHub
+Pages redeploy just because the generation date moved on.
+'''
+
+import os
+import re
+import hashlib
+import tempfile
+
+# Generated files are found relative to the repository, not the working
+# directory, so the scripts can be run from anywhere
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+CACHE_DIR = os.path.join(SCRIPTS_DIR, ".cache")  # Caches and state kept between runs
+
+# Lines that only record when a file was generated
+TIMESTAMP_LINES = re.compile(
+    r'^(?:# Generated from .* on \d{4}-\d{2}-\d{2}|\*Last updated: [^*\n]*\*)[ \t]*$',
+    re.MULTILINE
+)
+
+def repo_path(*parts):
+    """Absolute path of a file given relative to the repository root"""
+    return os.path.join(REPO_ROOT, *parts)
+
+def cache_path(name):
+    """Absolute path of a cache or state file"""
+    return os.path.join(CACHE_DIR, name)
+
+def content_hash(content):
+    """SHA-256 hex digest of a text string"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def file_hash(path):
+    """SHA-256 hex digest of a file's contents, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _replace_with(tmp_path, path, directory):
+    """Move a finished temporary file over path and make the rename durable"""
+    # Keep the permissions of the file being replaced
+    if os.path.exists(path):
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+    else:
+        os.chmod(tmp_path, 0o644)
+
+    os.replace(tmp_path, path)
+
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def _temporary_file(path):
+    """Create a temporary file next to path; return (fd, tmp_path, directory)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    return fd, tmp_path, directory
+
+def atomic_write(path, content, encoding='utf-8'):
+    """Write a file atomically via a temporary file, fsync and rename
+
+    Readers see either the old or the new contents, never a partial file,
+    even if the process dies mid-write.
+    """
+    fd, tmp_path, directory = _temporary_file(path)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace_with(tmp_path, path, directory)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class SemanticHasher:
+    """Incremental semantic_hash of text fed in pieces of any size
+
+    ignore is applied to complete lines only, which gives the same result as
+    applying it to the whole text as long as its matches never span a newline.
+    """
+
+    def __init__(self, ignore=TIMESTAMP_LINES):
+        self.ignore = ignore
+        self.digest = hashlib.sha256()
+        self.partial = ''
+
+    def update(self, text):
+        if self.ignore is None:
+            self.digest.update(text.encode('utf-8'))
+            return
+        # Only complete lines are filtered; the rest waits for its newline
+        text = self.partial + text
+        end = text.rfind('\n') + 1
+        self.partial = text[end:]
+        self.digest.update(self.ignore.sub('', text[:end]).encode('utf-8'))
+
+    def hexdigest(self):
+        if self.partial:
+            self.digest.update(self.ignore.sub('', self.partial).encode('utf-8'))
+            self.partial = ''
+        return self.digest.hexdigest()
+
+def semantic_hash(content, ignore=TIMESTAMP_LINES):
+    """Hash of text content with generation timestamp lines blanked out"""
+    hasher = SemanticHasher(ignore)
+    hasher.update(content)
+    return hasher.hexdigest()
+
+def file_semantic_hash(path, ignore=TIMESTAMP_LINES, encoding='utf-8'):
+    """semantic_hash of a file, read in chunks; None if it cannot be read as text"""
+    hasher = SemanticHasher(ignore)
+    try:
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            for chunk in iter(lambda: f.read(1 << 16), ''):
+                hasher.update(chunk)
+    except (OSError, UnicodeDecodeError):
+        # Missing, unreadable or not text in this encoding; just replace it
+        return None
+    return hasher.hexdigest()
+
+def write_if_changed(path, content, ignore=TIMESTAMP_LINES, encoding='utf-8'):
+    """Atomically write content unless the file already holds the same content
+
+    Lines matching ignore (by default the "Generated ... on <date>" and
+    "*Last updated: <date>*" stamps) are left out of the comparison, so a
+    new date alone does not cause a rewrite. Returns True if the file was
+    written and False if it was left untouched.
+    """
+    if file_semantic_hash(path, ignore, encoding) == semantic_hash(content, ignore):
+        return False
+
+    atomic_write(path, content, encoding)
+    return True
+
+class _HashingWriter:
+    """Text stream that writes to a file and hashes what passes through it"""
+
+    def __init__(self, f, hasher):
+        self.f = f
+        self.hasher = hasher
+
+    def write(self, text):
+        self.hasher.update(text)
+        return self.f.write(text)
+
+def write_stream_if_changed(path, write, ignore=TIMESTAMP_LINES, encoding='utf-8'):
+    """Streaming write_if_changed: write(stream) produces the content
+
+    The content goes straight into a temporary file next to path while its
+    semantic hash is computed, so it is never held in memory as a whole.
+    The temporary file then replaces path, or is discarded if path already
+    has the same content. Returns True if the file was written.
+    """
+    fd, tmp_path, directory = _temporary_file(path)
+    try:
+        hasher = SemanticHasher(ignore)
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            write(_HashingWriter(f, hasher))
+            f.flush()
+            os.fsync(f.fileno())
+
+        if file_semantic_hash(path, ignore, encoding) == hasher.hexdigest():
+            os.remove(tmp_path)
+            return False
+        _replace_with(tmp_path, path, directory)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
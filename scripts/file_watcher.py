@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+'''
+Notification of changes to a set of files, for the pipeline's watch mode.
+
+Each watched path is a file or a directory; a directory stands for the
+files directly inside it. On Linux, inotify is used through ctypes. It
+watches the directories containing the files, so files that are replaced
+atomically (written to a temporary file, then renamed) are still seen.
+Where inotify is not available the files are polled for changes in size
+and mtime instead. Either way, a burst of writes is reported as a single
+batch once the files have been quiet for a moment.
+'''
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+POLL_INTERVAL = 0.5  # Seconds between scans when polling
+DEBOUNCE = 0.2  # Seconds without changes before a batch is reported
+
+# inotify event flags (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+def is_hidden(name):
+    """Temporary files of atomic writes and editors' swap files start with a dot"""
+    return name.startswith('.')
+
+class PollingWatcher:
+    """Finds changes by comparing the size and mtime of the watched files"""
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                try:
+                    entries = list(os.scandir(path))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if entry.is_file() and not is_hidden(entry.name):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (path, stat.st_size, stat.st_mtime_ns)
+            else:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (path, stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        """Return the watched paths changed within timeout seconds (maybe none)"""
+        time.sleep(min(timeout, self.interval))
+        snapshot = self.scan()
+        changed = {snapshot[path][0] for path in snapshot.keys() - self.snapshot.keys()}
+        changed |= {self.snapshot[path][0] for path in self.snapshot.keys() - snapshot.keys()}
+        changed |= {snapshot[path][0] for path in snapshot.keys() & self.snapshot.keys()
+                    if snapshot[path] != self.snapshot[path]}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Receives changes from the kernel through inotify (Linux only)"""
+
+    def __init__(self, paths):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Directory watched -> ({file names watched in it}, path reported),
+        # where a set of None means every file in the directory
+        self.targets = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                self.targets.setdefault(path, {})[None] = path
+            else:
+                self.targets.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = path
+
+        self.directories = {}
+        try:
+            for directory in self.targets:
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+                self.directories[wd] = directory
+        except OSError:
+            self.close()
+            raise
+
+    def read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                return
+            raise
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+            yield wd, mask, name
+
+    def wait(self, timeout):
+        """Return the watched paths changed within timeout seconds (maybe none)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        for wd, mask, name in self.read_events():
+            targets = self.targets.get(self.directories.get(wd), {})
+            if name in targets:
+                changed.add(targets[name])
+            elif None in targets and not mask & IN_ISDIR and not is_hidden(name):
+                changed.add(targets[None])
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def make_watcher(paths):
+    """Return an inotify watcher for paths if possible, or else a polling one"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify is not available ({e}); polling for changes instead")
+    return PollingWatcher(paths)
+
+def watch(paths, debounce=DEBOUNCE):
+    """Yield sets of changed paths, one per burst of changes, until interrupted"""
+    watcher = make_watcher(paths)
+    try:
+        while True:
+            changed = watcher.wait(3600)
+            if not changed:
+                continue
+            # Keep collecting until the files have been quiet for a while
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            yield changed
+    finally:
+        watcher.close()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+'''
+Persistent on-disk cache for HTTP responses, used by the ADS scripts.
+
+Responses are stored in a SQLite database keyed by a hash of the request
+(method, URL, query parameters and body). Entries younger than the TTL are
+served without touching the network; older entries are revalidated with
+ETag/If-Modified-Since so an unchanged resource only costs a 304. The
+database is kept below a size limit by evicting least recently used entries.
+'''
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+def make_cache_key(method, url, params=None, data=None):
+    """Build a stable cache key for a request"""
+    request = {
+        "method": method.upper(),
+        "url": url,
+        "params": params or {},
+        "data": data or "",
+    }
+    encoded = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and LRU size eviction"""
+
+    def __init__(self, path, ttl=24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Shared between the export worker threads, guarded by self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def get(self, key):
+        """Return the cached entry for a key as a dict, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key)
+            )
+            self.conn.commit()
+
+        body, etag, last_modified, stored_at = row
+        return {
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": stored_at,
+        }
+
+    def is_fresh(self, entry):
+        """Check whether a cached entry is still within its TTL"""
+        return entry is not None and time.time() - entry["stored_at"] < self.ttl
+
+    def put(self, key, body, etag=None, last_modified=None):
+        """Store a response body along with its validators"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, body, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body.encode('utf-8')))
+            )
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, key):
+        """Mark an entry as freshly validated (e.g. after a 304)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key)
+            )
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
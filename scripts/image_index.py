@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+'''
+One-shot index of the images in a directory.
+
+The directory is scanned once and each image's size, modification time and
+pixel dimensions are recorded, so the page generators can check for images
+and emit width/height attributes without touching the filesystem per
+member. Dimensions are read from the PNG, JPEG, GIF or WebP header, so no
+imaging library is needed. The format is detected from the file contents,
+not the extension.
+'''
+
+import os
+import struct
+from collections import namedtuple
+
+ImageInfo = namedtuple('ImageInfo', ['path', 'size', 'mtime', 'width', 'height'])
+
+# JPEG start-of-frame markers (SOF0-SOF15, except DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers that stand alone, without a length field
+JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xDA)) | {0x01}
+
+def _png_size(f, header):
+    if header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+def _gif_size(f, header):
+    return struct.unpack('<HH', header[6:10])
+
+def _webp_size(f, header):
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and header[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and header[20:21] == b'\x2f':
+        bits = int.from_bytes(header[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height
+    return None
+
+def _exif_orientation(data):
+    """Return the EXIF orientation tag from an APP1 segment body, or 1"""
+    if not data.startswith(b'Exif\x00\x00') or len(data) < 14:
+        return 1
+    tiff = data[6:]
+    order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if order is None:
+        return 1
+    try:
+        offset = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+        for i in range(count):
+            entry = tiff[offset + 2 + 12 * i:offset + 14 + 12 * i]
+            if struct.unpack(order + 'H', entry[:2])[0] == 0x0112:
+                return struct.unpack(order + 'H', entry[8:10])[0]
+    except struct.error:
+        pass
+    return 1
+
+def _jpeg_size(f, header):
+    """Walk the JPEG segments up to the first start-of-frame marker
+
+    Dimensions are swapped for EXIF orientations 5-8 (rotated by 90
+    degrees), since browsers display the image upright.
+    """
+    f.seek(2)
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            if orientation in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+        if marker == 0xE1 and orientation == 1:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+def read_image_size(path):
+    """Return (width, height) of a PNG, JPEG, GIF or WebP image, or None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(32)
+            if header.startswith(b'\x89PNG\r\n\x1a\n'):
+                return _png_size(f, header)
+            if header.startswith(b'\xff\xd8'):
+                return _jpeg_size(f, header)
+            if header[:6] in (b'GIF87a', b'GIF89a'):
+                return _gif_size(f, header)
+            if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+                return _webp_size(f, header)
+    except (OSError, struct.error):
+        pass
+    return None
+
+class ImageIndex:
+    """Images in a directory by file name, from a single directory scan"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.images = {}
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"Warning: Could not scan image directory {directory}: {e}")
+            return
+
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            size = read_image_size(entry.path)
+            width, height = size if size else (None, None)
+            self.images[entry.name] = ImageInfo(entry.path, stat.st_size, stat.st_mtime, width, height)
+
+    def __contains__(self, name):
+        return name in self.images
+
+    def get(self, name):
+        """Return the ImageInfo for a file name, or None if there is no such file"""
+        return self.images.get(name)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+'''
+Asset pipeline for the site's images.
+
+Walks assets/img and writes recompressed copies of every JPEG and PNG at a
+set of widths, as WebP and in the source's own format, to
+assets/img/optimized/. Output file names contain a hash of the source, so
+they can be served with a long, immutable cache lifetime. A manifest JSON
+maps each source image to its variants. Images whose source hash is
+unchanged and whose variants all exist are skipped, and the resizing runs
+in a pool of worker processes.
+
+Requires Pillow.
+'''
+
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from file_utils import write_if_changed, repo_path, cache_path
+from image_index import read_image_size
+from thumbnails import SourceHashCache, hashed_name, save_image, HASH_LENGTH
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Configuration
+SOURCE_DIR = repo_path("assets", "img")
+OUTPUT_DIR = repo_path("assets", "img", "optimized")
+OUTPUT_PATH = "/assets/img/optimized/"  # Web path of the output directory
+MANIFEST_PATH = repo_path("assets", "img", "optimized", "manifest.json")
+WIDTHS = [480, 960, 1600]  # Widths of the resized copies, in pixels
+SKIP_DIRS = ["optimized", "group/thumbs"]  # Generated images under SOURCE_DIR
+# Kept apart from update_group_page's cache, so the two can run at the same time
+HASH_CACHE_PATH = cache_path("optimized_image_hashes.json")
+
+SOURCE_EXTENSIONS = {".jpg": "jpg", ".jpeg": "jpg", ".png": "png"}
+# Pillow format and save options for each output extension
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", {"optimize": True}),
+}
+HASHED_NAME = re.compile(r'-[0-9a-f]{%d}-\d+\.(?:%s)$' % (HASH_LENGTH, '|'.join(OUTPUT_FORMATS)))
+
+def find_images(source_dir, skip_dirs=SKIP_DIRS):
+    """Yield the paths of source images below source_dir, relative to it"""
+    skip = {os.path.normpath(directory) for directory in skip_dirs}
+    for root, dirs, files in os.walk(source_dir):
+        relative_root = os.path.relpath(root, source_dir)
+        dirs[:] = sorted(d for d in dirs
+                         if os.path.normpath(os.path.join(relative_root, d)) not in skip)
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS:
+                yield os.path.normpath(os.path.join(relative_root, name))
+
+def variant_widths(source_width, widths):
+    """Widths to produce for an image: no upscaling, at least one copy"""
+    selected = [width for width in sorted(widths) if width < source_width]
+    if not selected or max(widths) >= source_width:
+        selected.append(source_width)
+    return selected
+
+def resize_image(source_path, targets):
+    """Resize one image to each (width, dest_path, extension) target
+
+    Runs in a worker process.
+    """
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for width, dest_path, extension in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            pillow_format, options = OUTPUT_FORMATS[extension]
+            save_image(resized, dest_path, pillow_format, options)
+    return source_path
+
+def plan_image(relative_path, source_dir, output_dir, widths, hash_cache):
+    """Return the manifest record for an image and the variants still missing"""
+    source_path = os.path.join(source_dir, relative_path)
+    stat = os.stat(source_path)
+    size = read_image_size(source_path)
+    if size is None:
+        return None, []
+    digest = hash_cache.get(source_path, stat.st_size, stat.st_mtime)
+
+    subdir, name = os.path.split(relative_path)
+    source_format = SOURCE_EXTENSIONS[os.path.splitext(name)[1].lower()]
+    record = {'hash': digest, 'width': size[0], 'height': size[1], 'variants': []}
+    missing = []
+    for width in variant_widths(size[0], widths):
+        for extension in ("webp", source_format):
+            filename = hashed_name(name, digest, width, extension)
+            dest_path = os.path.join(output_dir, subdir, filename)
+            record['variants'].append({
+                'width': width,
+                'format': extension,
+                'path': OUTPUT_PATH + "/".join(filter(None, [subdir.replace(os.sep, "/"), filename])),
+            })
+            if not os.path.exists(dest_path):
+                missing.append((width, dest_path, extension))
+    return record, missing
+
+def remove_stale_outputs(output_dir, manifest):
+    """Delete hashed outputs that are not in the manifest; return how many"""
+    current = {variant['path'][len(OUTPUT_PATH):] for record in manifest.values()
+               for variant in record['variants']}
+    removed = 0
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, output_dir).replace(os.sep, "/")
+            if HASHED_NAME.search(name) and relative_path not in current:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def optimize_images(source_dir=SOURCE_DIR, output_dir=OUTPUT_DIR, manifest_path=MANIFEST_PATH,
+                    widths=WIDTHS, jobs=1):
+    """Bring the optimised copies and the manifest up to date with source_dir"""
+    hash_cache = SourceHashCache(HASH_CACHE_PATH)
+    manifest = {}
+    tasks = []
+    for relative_path in find_images(source_dir):
+        record, missing = plan_image(relative_path, source_dir, output_dir, widths, hash_cache)
+        if record is None:
+            print(f"Warning: Could not read the dimensions of {relative_path}; skipping it")
+            continue
+        manifest[relative_path.replace(os.sep, "/")] = record
+        if missing:
+            tasks.append((os.path.join(source_dir, relative_path), missing))
+    hash_cache.save()
+
+    for _, missing in tasks:
+        for _, dest_path, _ in missing:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    failed = set()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(resize_image, source_path, missing): source_path
+                   for source_path, missing in tasks}
+        for future, source_path in futures.items():
+            try:
+                future.result()
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                print(f"Warning: Could not optimise {source_path}: {e}")
+                failed.add(os.path.relpath(source_path, source_dir).replace(os.sep, "/"))
+    for relative_path in failed:
+        del manifest[relative_path]
+
+    removed = remove_stale_outputs(output_dir, manifest)
+    generated = sum(len(missing) for _, missing in tasks)
+    written = write_if_changed(manifest_path, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+    print(f"Optimised {len(manifest)} images: {len(tasks) - len(failed)} processed, "
+          f"{len(manifest) - len(tasks) + len(failed)} unchanged, "
+          f"{generated} files written, {removed} stale files removed")
+    print(f"Manifest {manifest_path} {'updated' if written else 'unchanged'}")
+    return manifest
+
+def parse_widths(value):
+    """Parse a comma-separated list of positive widths for --widths"""
+    try:
+        widths = [int(width) for width in value.split(",") if width.strip()]
+    except ValueError:
+        widths = None
+    if not widths or min(widths) < 1:
+        raise argparse.ArgumentTypeError(f"invalid widths {value!r}; expected positive pixel widths, e.g. 480,960,1600")
+    return widths
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Write resized, content-hashed copies of the site's images")
+    parser.add_argument("--widths", type=parse_widths, default=",".join(str(width) for width in WIDTHS),
+                        help="comma-separated widths in pixels (default %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                        help="resize in N worker processes (default: one per CPU)")
+    parser.add_argument("--source", default=SOURCE_DIR, help="image directory (default %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="output directory (default %(default)s)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="manifest file (default %(default)s)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if Image is None:
+        print("Error: Pillow is required to optimise images (pip install Pillow).")
+        sys.exit(1)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    optimize_images(args.source, args.output, args.manifest, args.widths, jobs)
+
+if __name__ == "__main__":
+    main()
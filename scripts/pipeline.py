@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+'''
+Single entry point for regenerating the site's data files.
+
+Each script is a stage with declared input and output files. A stage runs
+after every earlier stage that writes one of its inputs or one of its own
+outputs, so the stages form a DAG:
+
+    CV, ADS -> papers.bib -> publications YAML
+    group_members.yml -> group page, publications YAML (author highlighting)
+
+A stage is skipped when none of its inputs (its own code included) have
+changed since it last succeeded. Files whose size and mtime are unchanged
+are taken as unchanged; otherwise their content hash decides, so touching
+a file does not trigger a rebuild. Independent stages run in parallel, as
+separate processes, and a timing is reported for every stage.
+
+With --watch the pipeline keeps running instead and regenerates the
+publications YAML and the group page whenever the CV, papers.bib,
+group_members.yml or the group photos change. The scripts then run in this
+process, so what they have parsed and indexed stays in memory between
+changes and only the affected entries or page are redone.
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import cv_to_bibtex
+import bibtex_to_yaml
+from update_group_page import update_group_page, IMAGE_DIR
+from image_index import ImageIndex
+from thumbnails import SourceHashCache
+from file_watcher import watch, DEBOUNCE
+from file_utils import atomic_write, file_hash, repo_path, cache_path, SCRIPTS_DIR, REPO_ROOT
+
+STATE_PATH = cache_path("pipeline.json")  # Input fingerprints of each stage's last successful run
+BIBTEX_PATH = repo_path("_bibliography", "papers.bib")
+PUBLICATIONS_YAML_PATH = repo_path("_data", "publications.yml")
+GROUP_MEMBERS_PATH = repo_path("_data", "group_members.yml")
+
+Stage = namedtuple('Stage', ['name', 'command', 'inputs', 'outputs', 'default'])
+
+def script(name):
+    return os.path.join(SCRIPTS_DIR, name)
+
+# Stages in dependency order. Inputs and outputs may be directories; an
+# input directory stands for every file below it outside any stage's
+# outputs. ads and images are only run when asked for, since they need an
+# ADS token and network access, or Pillow and a lot of CPU time.
+STAGES = [
+    Stage('cv', ['cv_to_bibtex.py'],
+          [repo_path("assets", "files", "Hayne-CV", "main.tex"),
+           script("cv_to_bibtex.py"), script("cv_reader.py"), script("bibtex_merge.py"),
+           script("bibtex_reader.py"), script("file_utils.py")],
+          [BIBTEX_PATH], True),
+    Stage('ads', ['ads_to_bibtex.py'], [], [BIBTEX_PATH], False),
+    Stage('publications', ['bibtex_to_yaml.py', BIBTEX_PATH, PUBLICATIONS_YAML_PATH],
+          [BIBTEX_PATH, GROUP_MEMBERS_PATH,
+           script("bibtex_to_yaml.py"), script("bibtex_reader.py"), script("yaml_utils.py"),
+           script("file_utils.py")],
+          [PUBLICATIONS_YAML_PATH], True),
+    Stage('group_page', ['update_group_page.py'],
+          [GROUP_MEMBERS_PATH, repo_path("assets", "img", "group"),
+           script("update_group_page.py"), script("image_index.py"), script("thumbnails.py"),
+           script("yaml_utils.py"), script("file_utils.py")],
+          [repo_path("_pages", "2_group.md"), repo_path("assets", "img", "group", "thumbs")], True),
+    Stage('images', ['optimize_images.py'],
+          [repo_path("assets", "img"), script("optimize_images.py"), script("image_index.py"),
+           script("thumbnails.py"), script("file_utils.py")],
+          [repo_path("assets", "img", "optimized")], False),
+]
+
+def stage_dependencies(stages):
+    """Map each stage name to the names of the stages it must wait for"""
+    dependencies = {stage.name: set() for stage in stages}
+    for i, stage in enumerate(stages):
+        for other in stages[:i]:
+            if set(other.outputs) & set(stage.inputs + stage.outputs):
+                dependencies[stage.name].add(other.name)
+    return dependencies
+
+def select_stages(stages, names):
+    """The stages to consider: those named (or the defaults) and those reading their outputs"""
+    selected = {stage.name for stage in stages if (stage.name in names if names else stage.default)}
+    for i, stage in enumerate(stages):
+        if any(other.name in selected and set(other.outputs) & set(stage.inputs) for other in stages[:i]):
+            selected.add(stage.name)
+    return [stage for stage in stages if stage.name in selected]
+
+def is_within(path, directories):
+    return any(path == directory or path.startswith(directory + os.sep) for directory in directories)
+
+def input_files(stage, excluded):
+    """Files a stage reads, with directories expanded"""
+    for path in stage.inputs:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not is_within(os.path.join(root, d), excluded))
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if not is_within(file_path, excluded):
+                    yield file_path
+
+class PipelineState:
+    """Fingerprints of the inputs of each stage when it last succeeded
+
+    A fingerprint is the size, mtime and SHA-256 of a file. Hashes are only
+    recomputed for files whose size or mtime differ from the recorded ones.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self.stages = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.stages = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable pipeline state {path}: {e}")
+
+    def fingerprint(self, stage, files):
+        """Return the current fingerprints of a stage's input files"""
+        recorded = self.stages.get(stage.name, {})
+        fingerprints = {}
+        for path in files:
+            key = os.path.relpath(path, REPO_ROOT)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            previous = recorded.get(key)
+            if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime:
+                fingerprints[key] = previous
+            else:
+                fingerprints[key] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': file_hash(path)}
+        return fingerprints
+
+    def changed(self, stage, fingerprints):
+        """Whether a stage's inputs differ from its last successful run"""
+        recorded = self.stages.get(stage.name)
+        if recorded is None or recorded.keys() != fingerprints.keys():
+            return True
+        return any(recorded[key]['hash'] != fingerprint['hash'] for key, fingerprint in fingerprints.items())
+
+    def record(self, stage, fingerprints):
+        self.stages[stage.name] = fingerprints
+
+    def save(self):
+        try:
+            atomic_write(self.path, json.dumps(self.stages, indent=1, sort_keys=True))
+        except OSError as e:
+            print(f"Warning: Could not save pipeline state {self.path}: {e}")
+
+def run_command(stage):
+    """Run a stage's script; return its exit code and output"""
+    command = [sys.executable, script(stage.command[0])] + stage.command[1:]
+    result = subprocess.run(command, cwd=SCRIPTS_DIR, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout
+
+def run_stage(stage, state, excluded, force):
+    """Run one stage if its inputs have changed; return (status, seconds, output)"""
+    started = time.perf_counter()
+    fingerprints = state.fingerprint(stage, input_files(stage, excluded))
+    outputs_missing = any(not os.path.exists(path) for path in stage.outputs)
+    if stage.inputs and not force and not outputs_missing and not state.changed(stage, fingerprints):
+        # Keep refreshed mtimes so unchanged files are not hashed again
+        state.record(stage, fingerprints)
+        return 'up to date', time.perf_counter() - started, ""
+
+    returncode, output = run_command(stage)
+    if returncode != 0:
+        return f'failed ({returncode})', time.perf_counter() - started, output
+    state.record(stage, fingerprints)
+    return 'ran', time.perf_counter() - started, output
+
+def run_pipeline(names=(), force=False, jobs=None, verbose=False):
+    """Run the selected stages in dependency order; return True if none failed"""
+    stages = select_stages(STAGES, names)
+    dependencies = stage_dependencies(stages)
+    excluded = [output for stage in STAGES for output in stage.outputs]
+    state = PipelineState()
+    results = {}
+    pending = list(stages)
+    running = {}
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs or len(stages) or 1) as executor:
+        while pending or running:
+            unfinished = {stage.name for stage in pending} | set(running.values())
+            for stage in list(pending):
+                if dependencies[stage.name] & unfinished:
+                    continue
+                pending.remove(stage)
+                failed = [name for name in dependencies[stage.name] if name in results
+                          and results[name][0] not in ('ran', 'up to date')]
+                if failed:
+                    results[stage.name] = (f"skipped ({', '.join(sorted(failed))} failed)", 0.0, "")
+                    continue
+                running[executor.submit(run_stage, stage, state, excluded, force)] = stage.name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                status, seconds, output = results[name]
+                print(f"==> {name}: {status} in {seconds:.2f}s")
+                if output and (verbose or status not in ('ran', 'up to date')):
+                    print(output.rstrip())
+
+    state.save()
+
+    print("\nStage timings:")
+    for stage in stages:
+        status, seconds, _ = results[stage.name]
+        print(f"  {stage.name:<14} {status:<24} {seconds:8.2f}s")
+    print(f"  {'total':<14} {'':<24} {time.perf_counter() - started:8.2f}s")
+    return all(status in ('ran', 'up to date') for status, _, _ in results.values())
+
+class WatchSession:
+    """Generator state kept in memory between changes in watch mode
+
+    The group member index and the converted publication entries are only
+    rebuilt when group_members.yml changes, and the group image index only
+    when a photo changes. Unchanged BibTeX entries are never reconverted.
+    """
+
+    def __init__(self):
+        self.member_index = None
+        self.conversion_cache = None
+        self.images = None
+        self.hash_cache = SourceHashCache()
+
+    def sync_cv(self):
+        publications = cv_to_bibtex.extract_publications_from_cv()
+        if publications:
+            cv_to_bibtex.sync_publications(publications, cv_to_bibtex.SyncState())
+
+    def convert_publications(self):
+        if self.member_index is None:
+            self.member_index = bibtex_to_yaml.GroupMemberIndex(bibtex_to_yaml.get_group_members())
+            self.conversion_cache = bibtex_to_yaml.ConversionCache(bibtex_to_yaml.CACHE_PATH,
+                                                                   file_hash(GROUP_MEMBERS_PATH))
+        bibtex_to_yaml.convert_bibtex_to_yaml(BIBTEX_PATH, PUBLICATIONS_YAML_PATH,
+                                              member_index=self.member_index,
+                                              cache=self.conversion_cache)
+
+    def render_group_page(self):
+        if self.images is None:
+            self.images = ImageIndex(IMAGE_DIR)
+        update_group_page(self.images, self.hash_cache)
+
+    def update(self, changed):
+        """Redo whatever depends on the changed paths; return [(task, seconds)]"""
+        if GROUP_MEMBERS_PATH in changed:
+            self.member_index = None
+        if IMAGE_DIR in changed:
+            self.images = None
+
+        tasks = []
+        if cv_to_bibtex.CV_PATH in changed:
+            # The new papers.bib is picked up as a change of its own
+            tasks.append(('cv', self.sync_cv))
+        if changed & {BIBTEX_PATH, GROUP_MEMBERS_PATH}:
+            tasks.append(('publications', self.convert_publications))
+        if changed & {GROUP_MEMBERS_PATH, IMAGE_DIR}:
+            tasks.append(('group_page', self.render_group_page))
+
+        timings = []
+        for name, task in tasks:
+            started = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                print(f"Error: {name} failed: {e}")
+                traceback.print_exc()
+            timings.append((name, time.perf_counter() - started))
+        return timings
+
+def watch_pipeline(debounce=DEBOUNCE):
+    """Regenerate the publications YAML and group page on every change, until interrupted"""
+    paths = [cv_to_bibtex.CV_PATH, BIBTEX_PATH, GROUP_MEMBERS_PATH, IMAGE_DIR]
+    session = WatchSession()
+
+    def report(changed):
+        timings = session.update(changed)
+        names = ", ".join(sorted(os.path.relpath(path, REPO_ROOT) for path in changed))
+        done = ", ".join(f"{name} in {seconds * 1000:.0f} ms" for name, seconds in timings)
+        print(f"==> {names} changed: {done or 'nothing to do'}")
+
+    report(set(paths))
+    print("Watching for changes (Ctrl-C to stop)...")
+    try:
+        for changed in watch(paths, debounce):
+            report(changed)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Regenerate the site's data files, running only what has changed")
+    parser.add_argument("stages", nargs="*", metavar="stage",
+                        help="stages to run, followed by those depending on them (default: "
+                             + ", ".join(stage.name for stage in STAGES if stage.default) + "); one of "
+                             + ", ".join(stage.name for stage in STAGES))
+    parser.add_argument("--force", "-f", action="store_true", help="run stages even if their inputs are unchanged")
+    parser.add_argument("--jobs", "-j", type=int, default=0, metavar="N",
+                        help="run at most N stages at once (default: as many as are ready)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="show the output of every stage that runs")
+    parser.add_argument("--watch", "-w", action="store_true",
+                        help="keep running and regenerate the publications and group page when their inputs change")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    unknown = set(args.stages) - {stage.name for stage in STAGES}
+    if unknown:
+        print(f"Error: Unknown stage(s) {', '.join(sorted(unknown))}; "
+              f"expected {', '.join(stage.name for stage in STAGES)}")
+        sys.exit(1)
+    if args.watch:
+        watch_pipeline()
+        return
+    if not run_pipeline(args.stages, force=args.force, jobs=args.jobs, verbose=args.verbose):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+'''
+Checkpoint journal for resumable ADS syncs.
+
+The journal is an append-only JSON-lines file recording every search page
+and export batch as it completes. If a sync is interrupted or a batch fails,
+the next run replays the completed work from the journal and only fetches
+what is left. A run is marked complete once the BibTeX file has been
+updated, after which the next run starts from scratch.
+'''
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+class SyncJournal:
+    """Append-only record of completed search pages and export batches"""
+
+    def __init__(self, path, query, max_age=24 * 3600):
+        self.path = path
+        self.run_id = hashlib.sha256(query.encode('utf-8')).hexdigest()
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.entries = {}
+        self.resumed = False
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        if not self._load(max_age):
+            self.reset()
+
+    def _load(self, max_age):
+        """Replay an unfinished journal for the same query, if there is one"""
+        if not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from an interrupted write
+                        break
+        except OSError as e:
+            print(f"Warning: Could not read sync journal: {e}")
+            return False
+
+        if not records or records[0].get('type') != 'start':
+            return False
+        start = records[0]
+        if start.get('run_id') != self.run_id or time.time() - start.get('time', 0) > max_age:
+            return False
+
+        for record in records[1:]:
+            if record['type'] == 'page':
+                self.pages[record['cursor']] = record['data']
+            elif record['type'] == 'batch':
+                for bibcode, entry in record['entries'].items():
+                    self.entries[bibcode] = entry
+            elif record['type'] == 'complete':
+                return False
+
+        self.resumed = True
+        return True
+
+    def reset(self):
+        """Discard any previous progress and start a new run"""
+        self.pages = {}
+        self.entries = {}
+        self.resumed = False
+        with self.lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                pass
+        self._append({'type': 'start', 'run_id': self.run_id, 'time': time.time()})
+
+    def _append(self, record):
+        """Durably append a record to the journal"""
+        line = json.dumps(record, sort_keys=True) + "\n"
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def get_page(self, cursor_mark):
+        """Return the journalled search response for a cursor, or None"""
+        return self.pages.get(cursor_mark)
+
+    def record_page(self, cursor_mark, data):
+        self.pages[cursor_mark] = data
+        self._append({'type': 'page', 'cursor': cursor_mark, 'data': data})
+
+    def get_entry(self, bibcode):
+        """Return the journalled BibTeX entry for a bibcode, or None"""
+        return self.entries.get(bibcode)
+
+    def record_batch(self, entries_by_bibcode):
+        self.entries.update(entries_by_bibcode)
+        self._append({'type': 'batch', 'entries': entries_by_bibcode})
+
+    def complete(self):
+        """Mark the run as finished so the next sync starts fresh"""
+        self._append({'type': 'complete', 'time': time.time()})
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+'''
+Tests that rendering a BibTeX file with broken entries never duplicates one.
+
+Run with `python -m unittest test_bibtex_merge` (or pytest) from scripts/.
+'''
+
+import io
+import re
+import unittest
+import contextlib
+from bibtex_merge import BibtexDocument
+
+HEADER = b'---\n---\n\n'
+GOOD = b'@article{good2019,\n  title = {Good},\n  year = {2019}\n}\n\n'
+# Written by the old cv_to_bibtex: the accent's brace is never closed
+BROKEN = b'@article{broken2020,\n  author = {Sch{\\"orghofer, N.},\n  year = {2020}\n}\n\n'
+AFTER = b'@article{after2021,\n  title = {After},\n  year = {2021}\n}\n'
+
+def load(data):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BibtexDocument(data)
+
+def keys(text):
+    return re.findall(r'^@\w+\{([^,]+),', text, re.MULTILINE)
+
+class BrokenEntryRenderTest(unittest.TestCase):
+
+    def test_unchanged_entries_round_trip(self):
+        data = HEADER + GOOD + BROKEN + AFTER
+        document = load(data)
+        self.assertEqual(document.render(document.entries), data.decode('utf-8'))
+
+    def test_broken_entry_is_replaced_in_place(self):
+        document = load(HEADER + GOOD + BROKEN + AFTER)
+        fixed = {'ENTRYTYPE': 'article', 'ID': 'broken2020', 'author': 'Sch\\"orghofer, N.', 'year': '2020'}
+        rendered = document.render(document.entries + [fixed])
+        self.assertEqual(keys(rendered), ['good2019', 'broken2020', 'after2021'])
+        self.assertNotIn('Sch{', rendered)
+
+        # Rendering the result again changes nothing
+        document = load(rendered.encode('utf-8'))
+        self.assertEqual(document.render(document.entries), rendered)
+
+    def test_duplicate_keys_are_written_once(self):
+        document = load(HEADER + GOOD + GOOD + AFTER)
+        self.assertEqual(keys(document.render(document.entries)), ['good2019', 'after2021'])
+
+    def test_entry_containing_another_is_refused(self):
+        data = HEADER + b'@article{outer2020,\n  note = {see @misc{inner2020, title = {x}}}\n}\n'
+        with self.assertRaises(ValueError):
+            load(data)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+'''
+Tests of the BibTeX reader's recovery from entries with unbalanced braces.
+
+Run with `python -m unittest test_bibtex_reader` (or pytest) from scripts/.
+'''
+
+import io
+import unittest
+import contextlib
+from bibtex_reader import scan_bibtex_blocks, iter_bibtex_entries
+
+GOOD_BEFORE = b'@article{before2019,\n  title = {Before},\n  year = {2019}\n}\n\n'
+# Written by the old cv_to_bibtex: the accent's brace is never closed
+UNBALANCED = b'@article{broken2020,\n  author = {Sch{\\"orghofer, N.},\n  year = {2020}\n}\n\n'
+GOOD_AFTER = b'@article{after2021,\n  title = {After},\n  year = {2021}\n}\n'
+
+def scan(data):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        blocks = list(scan_bibtex_blocks(data))
+    return blocks, output.getvalue()
+
+class UnbalancedEntryTest(unittest.TestCase):
+
+    def test_blocks_after_an_unbalanced_entry_are_found(self):
+        data = GOOD_BEFORE + UNBALANCED + GOOD_AFTER
+        blocks, output = scan(data)
+        self.assertEqual([key for _, key, _, _ in blocks], ['before2019', 'broken2020', 'after2021'])
+        self.assertIn("Unbalanced braces in @article{broken2020} at line 6", output)
+
+        # The broken block ends before the blank lines preceding the next one
+        _, _, start, end = blocks[1]
+        self.assertEqual(data[start:end], UNBALANCED.rstrip())
+
+    def test_entries_after_an_unbalanced_entry_are_read(self):
+        data = GOOD_BEFORE + UNBALANCED + GOOD_AFTER
+        with contextlib.redirect_stdout(io.StringIO()):
+            keys = [entry['ID'] for entry, _, _ in iter_bibtex_entries(data)]
+        self.assertIn('before2019', keys)
+        self.assertIn('after2021', keys)
+
+    def test_unterminated_entry_at_end_of_file(self):
+        data = GOOD_BEFORE + b'@article{cut2022,\n  title = {Cut'
+        blocks, output = scan(data)
+        self.assertEqual([key for _, key, _, _ in blocks], ['before2019', 'cut2022'])
+        self.assertEqual(blocks[1][3], len(data))
+        self.assertIn("Unbalanced braces in @article{cut2022}", output)
+
+    def test_balanced_file_gives_no_warning(self):
+        data = GOOD_BEFORE + GOOD_AFTER
+        blocks, output = scan(data)
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(output, "")
+
+if __name__ == "__main__":
+    unittest.main()
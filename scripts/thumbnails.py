@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+'''
+Cached, content-hashed thumbnails for images shown at a fixed size.
+
+Each source image is cropped to a square and resized to every requested
+size, in WebP and in JPEG as a fallback. Thumbnail file names contain a
+hash of the source, so they never change for the same image and can be
+cached indefinitely by browsers. A thumbnail is only generated if its file
+does not exist yet, that is, when the source is new or has changed.
+Source hashes are cached by file size and mtime, so unchanged images are
+not even re-read.
+
+Pillow is optional. Without it no thumbnails are generated and pages fall
+back to the original images.
+'''
+
+import os
+import re
+import json
+import tempfile
+from collections import namedtuple
+from file_utils import atomic_write, file_hash, cache_path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+HASH_CACHE_PATH = cache_path("image_hashes.json")
+HASH_LENGTH = 12  # Hex digits of the source hash used in file names
+
+# (extension, Pillow format, save options), preferred format first
+THUMBNAIL_FORMATS = [
+    ("webp", "WEBP", {"quality": 80, "method": 6}),
+    ("jpg", "JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+]
+MIME_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+HASHED_NAME = re.compile(r'-[0-9a-f]{%d}-\d+\.(?:%s)$' % (
+    HASH_LENGTH, '|'.join(extension for extension, _, _ in THUMBNAIL_FORMATS)))
+
+Thumbnail = namedtuple('Thumbnail', ['size', 'format', 'filename'])
+
+def pillow_available():
+    return Image is not None
+
+class SourceHashCache:
+    """Content hashes of source images, reused while size and mtime match"""
+
+    def __init__(self, path=HASH_CACHE_PATH):
+        self.path = path
+        self.hashes = {}
+        self.changed = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.hashes = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable image hash cache {path}: {e}")
+
+    def get(self, path, size, mtime):
+        """Return the SHA-256 of an image, hashing it only if it has changed"""
+        key = os.path.abspath(path)
+        cached = self.hashes.get(key)
+        if cached and cached['size'] == size and cached['mtime'] == mtime:
+            return cached['hash']
+        digest = file_hash(path)
+        self.hashes[key] = {'size': size, 'mtime': mtime, 'hash': digest}
+        self.changed = True
+        return digest
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            atomic_write(self.path, json.dumps(self.hashes, indent=1, sort_keys=True))
+            self.changed = False
+        except OSError as e:
+            print(f"Warning: Could not save image hash cache {self.path}: {e}")
+
+def hashed_name(source_name, digest, size, extension):
+    """File name of a resized copy, e.g. paul-0123456789ab-180.webp"""
+    stem = os.path.splitext(source_name)[0]
+    return f"{stem}-{digest[:HASH_LENGTH]}-{size}.{extension}"
+
+def save_image(image, dest_path, pillow_format, options):
+    """Save a Pillow image atomically, flattening transparency for JPEG"""
+    if pillow_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+
+    directory = os.path.dirname(os.path.abspath(dest_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(dest_path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, pillow_format, **options)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def make_square_thumbnails(source_path, targets):
+    """Crop an image to a centred square and save it at each target size
+
+    targets is a list of (size, dest_path, pillow_format, options).
+    """
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for size, dest_path, pillow_format, options in targets:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            save_image(thumbnail, dest_path, pillow_format, options)
+
+def build_thumbnails(images, names, output_dir, sizes, hash_cache=None):
+    """Make sure square thumbnails exist for the named images
+
+    images is an ImageIndex of the source directory. Returns a dict mapping
+    each source name to its list of Thumbnails (in THUMBNAIL_FORMATS order,
+    then by size). Images that cannot be read are left out, and so is
+    everything when Pillow is not installed. Thumbnails in output_dir that
+    no longer belong to any of the images are removed.
+    """
+    if not pillow_available():
+        print("Warning: Pillow is not installed; using original images instead of thumbnails")
+        return {}
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    if hash_cache is None:
+        hash_cache = SourceHashCache()
+
+    thumbnails = {}
+    generated = 0
+    for name in sorted(set(names)):
+        info = images.get(name)
+        if info is None:
+            continue
+        digest = hash_cache.get(info.path, info.size, info.mtime)
+
+        entries = []
+        missing = []
+        for extension, pillow_format, options in THUMBNAIL_FORMATS:
+            for size in sizes:
+                filename = hashed_name(name, digest, size, extension)
+                entries.append(Thumbnail(size, extension, filename))
+                dest_path = os.path.join(output_dir, filename)
+                if not os.path.exists(dest_path):
+                    missing.append((size, dest_path, pillow_format, options))
+
+        if missing:
+            try:
+                make_square_thumbnails(info.path, missing)
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                print(f"Warning: Could not make thumbnails of {name}: {e}")
+                continue
+            generated += len(missing)
+        thumbnails[name] = entries
+    hash_cache.save()
+
+    # Remove thumbnails of images that have changed or are no longer used
+    current = {thumbnail.filename for entries in thumbnails.values() for thumbnail in entries}
+    removed = 0
+    for entry in os.scandir(output_dir):
+        if entry.is_file() and HASHED_NAME.search(entry.name) and entry.name not in current:
+            os.remove(entry.path)
+            removed += 1
+
+    print(f"Thumbnails: {generated} generated, {removed} removed, "
+          f"{sum(len(entries) for entries in thumbnails.values()) - generated} up to date")
+    return thumbnails
@@ -4,17 +4,49 @@ Script to generate a group members page from a YAML file for a Jekyll website
 using the al-folio theme.
 '''
 
-import yaml
 import os
 import re
+from string import Template
 from datetime import datetime
+from yaml_utils import load_yaml
+from file_utils import write_if_changed, repo_path
+from image_index import ImageIndex
+from thumbnails import build_thumbnails, MIME_TYPES
 
 # Configuration
-YAML_PATH = "../_data/group_members.yml"
-OUTPUT_PATH = "../_pages/2_group.md"
+YAML_PATH = repo_path("_data", "group_members.yml")
+OUTPUT_PATH = repo_path("_pages", "2_group.md")
 IMAGE_PATH = "/assets/img/group/"  # Path to group member images (web path)
-IMAGE_DIR = "../assets/img/group/"  # Actual directory path for file existence check
+IMAGE_DIR = repo_path("assets", "img", "group")  # Actual directory path for file existence check
 DEFAULT_IMAGE = "missing.jpg"  # Default image for members without a photo
+PROFILE_SIZE = 180  # Displayed size of profile photos in pixels (see .profile-img)
+THUMBNAIL_PATH = "/assets/img/group/thumbs/"  # Web path of generated thumbnails
+THUMBNAIL_DIR = repo_path("assets", "img", "group", "thumbs")  # Thumbnail directory on disk
+THUMBNAIL_SIZES = [PROFILE_SIZE, 2 * PROFILE_SIZE]  # 1x and 2x (high-DPI) screens
+STYLESHEET_PATH = "/assets/css/group.css"  # Shared styles for the group page
+
+# Page templates
+PAGE_HEADER_TEMPLATE = Template("""---
+layout: page
+title: group
+permalink: /group/
+description: Members of the Hayne Research Group
+---
+
+<link rel="stylesheet" href="$stylesheet">
+
+""")
+IMAGE_TEMPLATE = Template('  <img class="profile-img" src="$src" alt="$alt"$size loading="lazy" decoding="async">\n')
+SOURCE_TEMPLATE = Template('    <source type="$type" srcset="$srcset">\n')
+PICTURE_IMAGE_TEMPLATE = Template(
+    '    <img class="profile-img" src="$src" srcset="$srcset" alt="$alt" '
+    'width="$size" height="$size" loading="lazy" decoding="async">\n'
+)
+LINKED_NAME_TEMPLATE = Template('  <h4><a href="$website" target="_blank">$name</a></h4>\n')
+NAME_TEMPLATE = Template('  <h4>$name</h4>\n')
+ROLE_TEMPLATE = Template('  <p class="role">$role</p>\n')
+STATUS_TEMPLATE = Template('  <p class="status">$status</p>\n')
+INTERESTS_TEMPLATE = Template('  <p class="interests">$interests</p>\n')
 
 def read_group_data():
     """Read group member data from YAML file"""
@@ -24,7 +56,7 @@ def read_group_data():
         
     try:
         with open(YAML_PATH, 'r', encoding='utf-8') as f:
-            members = yaml.safe_load(f)
+            members = load_yaml(f)
         
         print(f"Read {len(members)} members from YAML")
         return members
@@ -41,8 +73,9 @@ def extract_custom_content():
         with open(OUTPUT_PATH, 'r', encoding='utf-8') as f:
             current_content = f.read()
             
-        # Look for content between the style block and the "Last updated" line
-        pattern = r'</style>\s*(.*?)\s*\*Last updated:'
+        # Look for content between the stylesheet (a link, or an inline style
+        # block in older pages) and the "Last updated" line
+        pattern = r'(?:</style>|<link rel="stylesheet" href="[^"]*">)\s*(.*?)\s*\*Last updated:'
         match = re.search(pattern, current_content, re.DOTALL)
         
         if match and len(match.group(1).strip()) > 0:
@@ -54,13 +87,34 @@ def extract_custom_content():
         print(f"Error reading existing group page: {e}")
         return None
 
-def image_exists(image_filename):
-    """Check if an image file exists in the assets directory"""
+def image_exists(image_filename, images):
+    """Check if an image file exists in the indexed assets directory"""
     if not image_filename:
         return False
     
-    image_path = os.path.join(IMAGE_DIR, image_filename)
-    return os.path.isfile(image_path)
+    return image_filename in images
+
+def check_member_images(members, images):
+    """Warn about missing photos and photos too small for the profile grid"""
+    for member in members:
+        image = member.get("image")
+        if not image:
+            continue
+        info = images.get(image)
+        if info is None:
+            print(f"Warning: Image {image} for {member['name']} not found in {IMAGE_DIR}")
+        elif info.width is None:
+            print(f"Warning: Could not read the dimensions of {image} for {member['name']}")
+        elif min(info.width, info.height) < PROFILE_SIZE:
+            print(f"Warning: Image {image} for {member['name']} is only {info.width}x{info.height}; "
+                  f"it is shown at {PROFILE_SIZE}x{PROFILE_SIZE}")
+
+def image_size_attributes(image_filename, images):
+    """Return width/height attributes for an indexed image, or an empty string"""
+    info = images.get(image_filename)
+    if info is None or info.width is None:
+        return ""
+    return f' width="{info.width}" height="{info.height}"'
 
 def get_last_name(name):
     """Extract the last name from a full name for sorting purposes
@@ -153,153 +207,155 @@ def categorize_members(members):
     
     return categories
 
-def generate_member_html(member):
-    """Generate HTML for a group member"""
-    html = '<div class="group-member">\n'
+def member_image(member, images):
+    """File name of the photo to show for a member (the default if missing)"""
+    if member.get("image") and image_exists(member["image"], images):
+        return member["image"]
+    return DEFAULT_IMAGE
+
+def render_image(out, image, alt, images, thumbnails):
+    """Render a profile <img>, as a <picture> of thumbnails when available"""
+    entries = thumbnails.get(image) or []
+    # The <img> fallback is a JPEG: the one closest to the displayed size,
+    # preferring those that are at least as large
+    jpegs = [thumbnail for thumbnail in entries if thumbnail.format == "jpg"]
+    if not jpegs:
+        out.append(IMAGE_TEMPLATE.substitute(
+            src=IMAGE_PATH + image, alt=alt, size=image_size_attributes(image, images)))
+        return
+    fallback = min(jpegs, key=lambda thumbnail: (thumbnail.size < PROFILE_SIZE, abs(thumbnail.size - PROFILE_SIZE)))
+    
+    srcsets = {}
+    for thumbnail in entries:
+        descriptor = f"{thumbnail.size / PROFILE_SIZE:g}x"
+        srcsets.setdefault(thumbnail.format, []).append(f"{THUMBNAIL_PATH}{thumbnail.filename} {descriptor}")
+    
+    out.append('  <picture>\n')
+    for extension, srcset in srcsets.items():
+        if extension != "jpg":
+            out.append(SOURCE_TEMPLATE.substitute(type=MIME_TYPES[extension], srcset=", ".join(srcset)))
+    out.append(PICTURE_IMAGE_TEMPLATE.substitute(
+        src=THUMBNAIL_PATH + fallback.filename, srcset=", ".join(srcsets["jpg"]), alt=alt, size=PROFILE_SIZE))
+    out.append('  </picture>\n')
+
+def render_member(out, member, images, thumbnails):
+    """Render the HTML for a group member"""
+    out.append('<div class="group-member">\n')
     
     # Image (use default if image is missing or doesn't exist)
-    if member.get("image") and image_exists(member["image"]):
-        html += f'  <img class="profile-img" src="{IMAGE_PATH}{member["image"]}" alt="{member["name"]}">\n'
-    else:
-        html += f'  <img class="profile-img" src="{IMAGE_PATH}{DEFAULT_IMAGE}" alt="{member["name"]}">\n'
+    render_image(out, member_image(member, images), member["name"], images, thumbnails)
     
     # Name with optional website link
     if member.get("website"):
-        html += f'  <h4><a href="{member["website"]}" target="_blank">{member["name"]}</a></h4>\n'
+        out.append(LINKED_NAME_TEMPLATE.substitute(website=member["website"], name=member["name"]))
     else:
-        html += f'  <h4>{member["name"]}</h4>\n'
+        out.append(NAME_TEMPLATE.substitute(name=member["name"]))
     
     # Role
-    html += f'  <p class="role">{member["role"]}</p>\n'
+    out.append(ROLE_TEMPLATE.substitute(role=member["role"]))
     
     # Status for alumni
     if member["status"].lower().startswith("alumni") or "former" in member["status"].lower():
-        html += f'  <p class="status">{member["status"]}</p>\n'
+        out.append(STATUS_TEMPLATE.substitute(status=member["status"]))
     
     # Research interests
     if member.get("research_interest"):
-        html += f'  <p class="interests">{member["research_interest"]}</p>\n'
+        out.append(INTERESTS_TEMPLATE.substitute(interests=member["research_interest"]))
     
-    html += '</div>\n'
-    return html
+    out.append('</div>\n')
+
+def render_member_grid(out, members, images, thumbnails):
+    out.append('<div class="group-container">\n')
+    for member in members:
+        render_member(out, member, images, thumbnails)
+    out.append('</div>\n')
 
-def generate_markdown_content(categories, custom_content=None):
-    """Generate full markdown content for the group page"""
+def generate_markdown_content(categories, images, thumbnails, custom_content=None):
+    """Generate full markdown content for the group page
+    
+    Fragments are rendered from the precompiled templates into a list and
+    joined once at the end.
+    """
     current_date = datetime.now().strftime("%B %d, %Y")
     
-    # Page header
-    content = f"""---
-layout: page
-title: group
-permalink: /group/
-description: Members of the Hayne Research Group
----
-
-<style>
-.group-container {{
-  display: flex;
-  flex-wrap: wrap;
-  justify-content: flex-start;
-  gap: 20px;
-}}
-.group-member {{
-  width: 200px;
-  margin-bottom: 30px;
-}}
-.profile-img {{
-  width: 180px;
-  height: 180px;
-  object-fit: cover;
-  border-radius: 5px;
-}}
-.role {{
-  margin: 0;
-  color: #555;
-}}
-.status {{
-  margin: 0;
-  color: #777;
-  font-style: italic;
-}}
-.interests {{
-  margin-top: 5px;
-  font-size: 0.9em;
-}}
-</style>
-
-"""
-
+    # Page header, linking the shared group stylesheet
+    out = [PAGE_HEADER_TEMPLATE.substitute(stylesheet=STYLESHEET_PATH)]
+    
     # Add the custom content (EPIC description and photo) if it exists
     if custom_content:
-        content += custom_content + "\n\n"
+        out.append(custom_content + "\n\n")
     
     # Add the last updated date
-    content += f"*Last updated: {current_date}*\n\n"
+    out.append(f"*Last updated: {current_date}*\n\n")
     
-    content += "## Current Group Members\n\n"
+    out.append("## Current Group Members\n\n")
     
     # Add current members by category, maintaining the desired order
     for role, members in categories["Current"].items():
         if members:
             # Special case for Principal Investigator (no plural)
             if role == "Principal Investigator":
-                content += f"### {role}\n\n"
+                out.append(f"### {role}\n\n")
             else:
                 # Determine plural form of role
                 role_plural = role + "s" if not role.endswith("s") else role
-                content += f"### {role_plural}\n\n"
+                out.append(f"### {role_plural}\n\n")
             
-            content += '<div class="group-container">\n'
-            
-            # Add each member in this role category
-            for member in members:
-                content += generate_member_html(member)
-            
-            content += '</div>\n\n'
+            render_member_grid(out, members, images, thumbnails)
+            out.append('\n')
     
     # Add alumni if any exist
     if categories["Alumni"]:
-        content += "## Alumni\n\n"
-        content += '<div class="group-container">\n'
+        out.append("## Alumni\n\n")
         
         # Alumni are already sorted by last name in categorize_members
-        for member in categories["Alumni"]:
-            content += generate_member_html(member)
-        
-        content += '</div>\n'
+        render_member_grid(out, categories["Alumni"], images, thumbnails)
     
-    return content
+    return "".join(out)
 
 def write_output_file(content):
-    """Write the generated content to the output file"""
-    directory = os.path.dirname(OUTPUT_PATH)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    print(f"Group page successfully generated at {OUTPUT_PATH}")
+    """Write the generated content to the output file, unless only the date changed"""
+    if write_if_changed(OUTPUT_PATH, content):
+        print(f"Group page successfully generated at {OUTPUT_PATH}")
+    else:
+        print(f"Group page at {OUTPUT_PATH} unchanged; not rewriting it.")
 
-def main():
+def update_group_page(images=None, hash_cache=None):
+    """Regenerate the group page
+    
+    An ImageIndex of the image directory and a SourceHashCache can be
+    passed in to reuse them across calls, as the pipeline's watch mode does.
+    """
     # Read group data from YAML
     members = read_group_data()
     if not members:
-        return
+        return False
     
     # Extract any existing custom content (EPIC description and photo)
     custom_content = extract_custom_content()
     
+    # Scan the image directory once for all members
+    if images is None:
+        images = ImageIndex(IMAGE_DIR)
+    check_member_images(members, images)
+    
+    # Generate thumbnails of any new or changed photos
+    thumbnails = build_thumbnails(images, [member_image(member, images) for member in members],
+                                  THUMBNAIL_DIR, THUMBNAIL_SIZES, hash_cache)
+    
     # Categorize members
     categories = categorize_members(members)
     
     # Generate markdown content
-    content = generate_markdown_content(categories, custom_content)
+    content = generate_markdown_content(categories, images, thumbnails, custom_content)
     
     # Write to output file
     write_output_file(content)
-    
-    print("Done! Remember to upload profile photos to the assets/img/group/ directory.")
+    return True
+
+def main():
+    if update_group_page():
+        print("Done! Remember to upload profile photos to the assets/img/group/ directory.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
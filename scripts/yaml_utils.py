@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+'''
+YAML loading and dumping with the libyaml C extension when it is available.
+
+PyYAML's pure-Python emitter and parser dominate the runtime of the
+generators on large files. The C-accelerated CSafeLoader and CSafeDumper
+are used when PyYAML was built with libyaml, falling back transparently to
+the pure-Python safe loader and dumper otherwise.
+'''
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+def load_yaml(stream):
+    """Parse a YAML document from a string or file with the safe loader"""
+    return yaml.load(stream, Loader=SafeLoader)
+
+def dump_yaml(data, stream=None, **kwargs):
+    """Dump data as YAML with the safe dumper (to a string if stream is None)"""
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+def dump_yaml_list(items, stream, **kwargs):
+    """Write a top-level YAML sequence one item at a time
+
+    The output is the same as dumping the whole list at once, but only one
+    item is ever represented in memory, so items can come from a generator.
+    """
+    empty = True
+    for item in items:
+        dump_yaml([item], stream, **kwargs)
+        empty = False
+    if empty:
+        dump_yaml([], stream, **kwargs)